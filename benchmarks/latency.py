@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency from a window mapping to its actions taking effect.
+
+Starts Xvfb, a window manager (benchmarks/miniwm.py unless --wm is given) and
+devilspy, then maps bursts of client windows with known classes. For each
+window the time from mapping until it reaches its expected workspace,
+geometry and state is measured, and percentiles are reported per action type.
+Needs Xvfb and python-xlib, no network access.
+
+    $ PYTHONPATH=. python benchmarks/latency.py --bursts 20 --burst-size 12
+"""
+
+import argparse
+import os
+import os.path
+import select
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+from Xlib import X, Xatom
+from Xlib.display import Display
+from Xlib.error import XError
+import yaml
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+WIDTH, HEIGHT = 1920, 1080
+# Initial geometry of client windows, no action leaves it unchanged
+INITIAL = (10, 10, 300, 200)
+
+
+def _centered(width, height):
+    return (round((WIDTH - width) / 2), round((HEIGHT - height) / 2))
+
+
+# action type -> (actions, expected final window properties)
+SCENARIOS = {
+    "workspace": ([{"workspace": 2}], {"desktop": 2}),
+    "position_wm": ([{"position_wm": [100, 120]}], {"pos": (100, 120)}),
+    "position_x11": ([{"position_x11": [200, 220]}], {"pos": (200, 220)}),
+    "size": ([{"size": [640, 480]}], {"size": (640, 480)}),
+    "center": ([{"center": True}], {"pos": _centered(*INITIAL[2:])}),
+    "maximize": (
+        [{"maximize": True}],
+        {"pos": (0, 0), "size": (WIDTH, HEIGHT), "maximized": True},
+    ),
+    "combined": (
+        [{"workspace": 3}, {"position_wm": [50, 60]}, {"size": [800, 600]}],
+        {"desktop": 3, "pos": (50, 60), "size": (800, 600)},
+    ),
+}
+# devilspy is ready once it moved a warm-up window
+WARMUP = "warmup"
+WARMUP_SCENARIO = ([{"workspace": 1}], {"desktop": 1})
+
+
+def get_class(scenario):
+    """Get WM_CLASS class of client windows for scenario."""
+    return "Bench-" + scenario
+
+
+def make_config():
+    """Create devilspy config with one entry per scenario."""
+    config = {}
+    for scenario, (actions, _) in {**SCENARIOS, WARMUP: WARMUP_SCENARIO}.items():
+        config[scenario] = {
+            "rules": [
+                {"match": "exact", "field": "class_group", "val": get_class(scenario)}
+            ],
+            "actions": actions,
+        }
+    return config
+
+
+def start_xvfb(xvfb):
+    """Start Xvfb on a free display, return process and display name."""
+    read_fd, write_fd = os.pipe()
+    proc = subprocess.Popen(  # pylint: disable=consider-using-with
+        shlex.split(xvfb)
+        + [
+            "-displayfd",
+            str(write_fd),
+            "-screen",
+            "0",
+            "{}x{}x24".format(WIDTH, HEIGHT),
+            "-nolisten",
+            "tcp",
+        ],
+        pass_fds=(write_fd,),
+        stderr=subprocess.DEVNULL,
+    )
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        number = pipe.readline().strip()
+    if not number:
+        proc.kill()
+        raise RuntimeError("Xvfb did not start.")
+    return proc, ":" + number
+
+
+def wait_for(predicate, timeout, what):
+    """Poll predicate until it is true."""
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise RuntimeError("Timed out waiting for {}.".format(what))
+        time.sleep(0.05)
+
+
+class Clients:
+    """Map client windows and watch them reach their expected state."""
+
+    def __init__(self):
+        self.display = Display()
+        self.root = self.display.screen().root
+        self.atoms = {
+            name: self.display.intern_atom(name)
+            for name in (
+                "_NET_SUPPORTING_WM_CHECK",
+                "_NET_WM_NAME",
+                "_NET_WM_DESKTOP",
+                "_NET_WM_STATE",
+                "_NET_WM_STATE_MAXIMIZED_HORZ",
+                "_NET_WM_STATE_MAXIMIZED_VERT",
+                "UTF8_STRING",
+            )
+        }
+
+    def has_wm(self):
+        """Check if an EWMH window manager is running."""
+        prop = self.root.get_full_property(
+            self.atoms["_NET_SUPPORTING_WM_CHECK"], Xatom.WINDOW
+        )
+        return prop is not None
+
+    def create(self, scenario, number):
+        """Create and map client window, return window and map time."""
+        window = self.root.create_window(
+            *INITIAL,
+            0,
+            X.CopyFromParent,
+            event_mask=X.StructureNotifyMask | X.PropertyChangeMask,
+        )
+        name = "{} {}".format(scenario, number)
+        window.set_wm_class(scenario.lower(), get_class(scenario))
+        window.set_wm_name(name)
+        window.change_property(
+            self.atoms["_NET_WM_NAME"], self.atoms["UTF8_STRING"], 8, name.encode()
+        )
+        window.map()
+        self.display.flush()
+        return window, time.perf_counter()
+
+    def snapshot(self, window):
+        """Get current workspace, geometry and state of window."""
+        desktop = window.get_full_property(
+            self.atoms["_NET_WM_DESKTOP"], Xatom.CARDINAL
+        )
+        state = window.get_full_property(self.atoms["_NET_WM_STATE"], Xatom.ATOM)
+        state = set(state.value) if state else set()
+        geom = window.get_geometry()
+        pos = self.root.translate_coords(window, 0, 0)
+        return {
+            "desktop": desktop.value[0] if desktop else None,
+            "pos": (pos.x, pos.y),
+            "size": (geom.width, geom.height),
+            "maximized": {
+                self.atoms["_NET_WM_STATE_MAXIMIZED_HORZ"],
+                self.atoms["_NET_WM_STATE_MAXIMIZED_VERT"],
+            }
+            <= state,
+        }
+
+    def is_done(self, window, expected):
+        """Check if window reached expected state."""
+        try:
+            snapshot = self.snapshot(window)
+        except XError:
+            return False
+        return all(snapshot[key] == value for key, value in expected.items())
+
+    def run_burst(self, scenarios, timeout):
+        """
+        Map one window per (scenario, expected state) pair at once.
+
+        Return latencies as (scenario, seconds) pairs and timeouts as a list
+        of scenarios.
+        """
+        pending = {}
+        for number, (scenario, expected) in enumerate(scenarios):
+            window, mapped = self.create(scenario, number)
+            pending[window.id] = (window, scenario, expected, mapped)
+
+        latencies = []
+        deadline = time.perf_counter() + timeout
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            if not self.display.pending_events():
+                select.select([self.display], [], [], remaining)
+            changed = set()
+            while self.display.pending_events():
+                event = self.display.next_event()
+                if event.type in (X.ConfigureNotify, X.PropertyNotify):
+                    changed.add(event.window.id)
+            for xid in changed & set(pending):
+                window, scenario, expected, mapped = pending[xid]
+                if self.is_done(window, expected):
+                    latencies.append((scenario, time.perf_counter() - mapped))
+                    del pending[xid]
+
+        timeouts = [scenario for _, scenario, _, _ in pending.values()]
+        for window, _, _, _ in pending.values():
+            window.destroy()
+        return latencies, timeouts
+
+    def destroy_all(self):
+        """Destroy all client windows."""
+        for child in self.root.query_tree().children:
+            attrs = child.get_attributes()
+            if attrs.map_state != X.IsUnmapped and not attrs.override_redirect:
+                child.destroy()
+        self.display.sync()
+
+
+def percentile(values, pct):
+    """Get nearest-rank percentile of sorted values."""
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def report(latencies, timeouts):
+    """Print percentiles per action type."""
+    print(
+        "{:<14} {:>6} {:>9} {:>9} {:>9} {:>9} {:>8}".format(
+            "action", "n", "p50 ms", "p90 ms", "p99 ms", "max ms", "timeouts"
+        )
+    )
+    for scenario in list(SCENARIOS) + ["all"]:
+        values = sorted(
+            seconds * 1000
+            for name, seconds in latencies
+            if scenario in ("all", name)
+        )
+        missed = sum(1 for name in timeouts if scenario in ("all", name))
+        if not values:
+            print("{:<14} {:>6d} {:>49d}".format(scenario, 0, missed))
+            continue
+        print(
+            "{:<14} {:>6d} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>8d}".format(
+                scenario,
+                len(values),
+                percentile(values, 50),
+                percentile(values, 90),
+                percentile(values, 99),
+                values[-1],
+                missed,
+            )
+        )
+
+
+def run(args, tmpdir):
+    """Start X server, window manager and devilspy, then measure."""
+    procs = []
+    try:
+        xvfb, display = start_xvfb(args.xvfb)
+        procs.append(xvfb)
+        os.environ["DISPLAY"] = display
+        clients = Clients()
+
+        if args.wm:
+            wm_cmd = shlex.split(args.wm)
+        else:
+            wm_cmd = [sys.executable, os.path.join(HERE, "miniwm.py")]
+        procs.append(subprocess.Popen(wm_cmd))  # pylint: disable=consider-using-with
+        wait_for(clients.has_wm, 10, "window manager")
+
+        config_file = os.path.join(tmpdir, "config.yml")
+        with open(config_file, "w") as stream:
+            yaml.safe_dump(make_config(), stream)
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, (ROOT, env.get("PYTHONPATH")))
+        )
+        log_file = os.path.join(tmpdir, "devilspy.log")
+        with open(log_file, "w") as log:
+            procs.append(
+                subprocess.Popen(  # pylint: disable=consider-using-with
+                    [sys.executable, "-m", "devilspy", "--config", config_file],
+                    env=env,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                )
+            )
+
+        _, timeouts = clients.run_burst(
+            [(WARMUP, WARMUP_SCENARIO[1])], args.startup_timeout
+        )
+        if timeouts:
+            with open(log_file) as log:
+                sys.stderr.write(log.read())
+            raise RuntimeError("devilspy did not handle the warm-up window.")
+        clients.destroy_all()
+
+        scenarios = list(SCENARIOS)
+        latencies, timeouts = [], []
+        for burst in range(args.bursts):
+            batch = [
+                (scenario, SCENARIOS[scenario][1])
+                for scenario in (
+                    scenarios[(burst + i) % len(scenarios)]
+                    for i in range(args.burst_size)
+                )
+            ]
+            burst_latencies, burst_timeouts = clients.run_burst(batch, args.timeout)
+            latencies += burst_latencies
+            timeouts += burst_timeouts
+            clients.destroy_all()
+            time.sleep(args.interval)
+        return latencies, timeouts
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            try:
+                proc.wait(5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=12)
+    parser.add_argument(
+        "--interval", type=float, default=0.5, help="Pause between bursts (s)."
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=5, help="Max wait per burst (s)."
+    )
+    parser.add_argument("--startup-timeout", type=float, default=15)
+    parser.add_argument("--xvfb", default="Xvfb", help="Xvfb command.")
+    parser.add_argument(
+        "--wm", help="Window manager command (default: benchmarks/miniwm.py)."
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        latencies, timeouts = run(args, tmpdir)
+    report(latencies, timeouts)
+    if timeouts:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark indexed prefix, suffix and glob rules against equivalent regexes.
+
+    $ python benchmarks/matchers.py --entries 1000 --windows 10000
+"""
+
+import argparse
+import fnmatch
+import random
+import time
+
+from devilspy.config import Config
+from devilspy.windowinfo import WindowInfo
+
+
+class FakeApplication:
+    """Stand-in for Wnck.Application."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def get_name(self):
+        """Get application name."""
+        return self._name
+
+
+class FakeWindowType:
+    """Stand-in for Wnck.WindowType."""
+
+    value_nick = "normal"
+
+
+class FakeWindow:
+    """Stand-in for Wnck.Window."""
+
+    def __init__(self, class_group, name):
+        self._class_group = class_group
+        self._name = name
+
+    def get_class_group_name(self):
+        """Get class group name."""
+        return self._class_group
+
+    def get_name(self):
+        """Get window title."""
+        return self._name
+
+    def get_role(self):
+        """Get window role."""
+        return ""
+
+    def get_application(self):
+        """Get application."""
+        return FakeApplication(self._class_group.lower())
+
+    def get_window_type(self):
+        """Get window type."""
+        return FakeWindowType()
+
+    def get_transient(self):
+        """Get parent window."""
+        return None
+
+
+def make_configs(entries):
+    """Create indexed config and equivalent regex config."""
+    indexed, regex = {}, {}
+    for i in range(entries):
+        kind = ("prefix", "suffix", "glob")[i % 3]
+        if kind == "prefix":
+            val = "App{}".format(i)
+            pattern = "^" + val
+        elif kind == "suffix":
+            val = " - Document {}".format(i)
+            pattern = val + "$"
+        else:
+            val = "Project{} *.py*".format(i)
+            pattern = fnmatch.translate(val)
+        field = "class_group" if kind == "prefix" else "name"
+        actions = [{"maximize": True}]
+        indexed["e{}".format(i)] = {
+            "rules": [{"match": kind, "field": field, "val": val}],
+            "actions": actions,
+        }
+        regex["e{}".format(i)] = {
+            "rules": [{"match": "regex", "field": field, "val": pattern}],
+            "actions": actions,
+        }
+    return Config.create(indexed, "indexed"), Config.create(regex, "regex")
+
+
+def make_windows(count, entries, rng):
+    """Create windows, about half of them matching some entry."""
+    windows = []
+    for _ in range(count):
+        i = rng.randrange(entries * 2)
+        windows.append(
+            FakeWindow(
+                "App{}Window".format(i),
+                "Project{} main.py - Document {}".format(rng.randrange(entries * 2), i),
+            )
+        )
+    return windows
+
+
+def bench(config, windows):
+    """Match all windows, return duration and number of matches."""
+    start = time.perf_counter()
+    matches = sum(len(config.engine.match(WindowInfo(window))) for window in windows)
+    return time.perf_counter() - start, matches
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--windows", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    indexed, regex = make_configs(args.entries)
+    windows = make_windows(args.windows, args.entries, rng)
+
+    results = {}
+    for name, config in (("indexed", indexed), ("regex", regex)):
+        duration, matches = bench(config, windows)
+        results[name] = duration
+        print(
+            "{:<8} {:>8.1f} us/window  {:>6d} matches".format(
+                name, duration / len(windows) * 1e6, matches
+            )
+        )
+    print("speedup  {:>8.1f}x".format(results["regex"] / results["indexed"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Minimal EWMH window manager for benchmarks.
+
+Does not reparent or decorate windows. Implements just enough of EWMH for
+libwnck to see windows and for devilspy actions to take effect: workspaces,
+client lists, _NET_MOVERESIZE_WINDOW, _NET_WM_STATE and _NET_ACTIVE_WINDOW.
+
+    $ DISPLAY=:99 python benchmarks/miniwm.py --workspaces 4
+"""
+
+import argparse
+
+from Xlib import X, Xatom
+from Xlib.display import Display
+from Xlib.error import XError
+
+SUPPORTED = (
+    "_NET_SUPPORTED",
+    "_NET_SUPPORTING_WM_CHECK",
+    "_NET_CLIENT_LIST",
+    "_NET_CLIENT_LIST_STACKING",
+    "_NET_NUMBER_OF_DESKTOPS",
+    "_NET_DESKTOP_GEOMETRY",
+    "_NET_DESKTOP_VIEWPORT",
+    "_NET_CURRENT_DESKTOP",
+    "_NET_WORKAREA",
+    "_NET_ACTIVE_WINDOW",
+    "_NET_CLOSE_WINDOW",
+    "_NET_MOVERESIZE_WINDOW",
+    "_NET_WM_NAME",
+    "_NET_WM_DESKTOP",
+    "_NET_WM_STATE",
+    "_NET_WM_STATE_MAXIMIZED_HORZ",
+    "_NET_WM_STATE_MAXIMIZED_VERT",
+    "_NET_WM_STATE_FULLSCREEN",
+    "_NET_WM_STATE_HIDDEN",
+    "_NET_WM_STATE_SHADED",
+    "_NET_WM_STATE_STICKY",
+    "_NET_WM_STATE_ABOVE",
+    "_NET_WM_STATE_BELOW",
+    "_NET_WM_STATE_SKIP_PAGER",
+    "_NET_WM_STATE_SKIP_TASKBAR",
+    "_NET_FRAME_EXTENTS",
+)
+
+# _NET_WM_STATE client message actions
+STATE_REMOVE, STATE_ADD, STATE_TOGGLE = 0, 1, 2
+
+
+class MiniWM:
+    """Window manager state and event handlers."""
+
+    def __init__(self, display, workspaces):
+        self.display = display
+        self.root = display.screen().root
+        self.width = display.screen().width_in_pixels
+        self.height = display.screen().height_in_pixels
+        self.workspaces = workspaces
+        self.clients = []
+        self.states = {}
+        self.restore = {}
+        self.atoms = {name: display.intern_atom(name) for name in SUPPORTED}
+        self.utf8 = display.intern_atom("UTF8_STRING")
+        self.handlers = {
+            X.MapRequest: self.on_map_request,
+            X.ConfigureRequest: self.on_configure_request,
+            X.UnmapNotify: self.on_unmap,
+            X.DestroyNotify: self.on_unmap,
+            X.ClientMessage: self.on_client_message,
+        }
+        self.messages = {
+            self.atoms["_NET_WM_DESKTOP"]: self.msg_wm_desktop,
+            self.atoms["_NET_CURRENT_DESKTOP"]: self.msg_current_desktop,
+            self.atoms["_NET_MOVERESIZE_WINDOW"]: self.msg_moveresize,
+            self.atoms["_NET_WM_STATE"]: self.msg_wm_state,
+            self.atoms["_NET_ACTIVE_WINDOW"]: self.msg_active_window,
+            self.atoms["_NET_CLOSE_WINDOW"]: self.msg_close_window,
+        }
+
+    def set_cardinals(self, window, name, values, type_=Xatom.CARDINAL):
+        """Set 32 bit list property."""
+        window.change_property(self.atoms[name], type_, 32, list(values))
+
+    def setup(self):
+        """Become the window manager and publish root properties."""
+        self.root.change_attributes(
+            event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask
+        )
+        check = self.root.create_window(-1, -1, 1, 1, 0, X.CopyFromParent)
+        check.change_property(self.atoms["_NET_WM_NAME"], self.utf8, 8, b"miniwm")
+        for window in (self.root, check):
+            self.set_cardinals(
+                window, "_NET_SUPPORTING_WM_CHECK", [check.id], Xatom.WINDOW
+            )
+        self.set_cardinals(
+            self.root, "_NET_SUPPORTED", self.atoms.values(), Xatom.ATOM
+        )
+        self.set_cardinals(self.root, "_NET_NUMBER_OF_DESKTOPS", [self.workspaces])
+        self.set_cardinals(self.root, "_NET_CURRENT_DESKTOP", [0])
+        self.set_cardinals(
+            self.root, "_NET_DESKTOP_GEOMETRY", [self.width, self.height]
+        )
+        self.set_cardinals(self.root, "_NET_DESKTOP_VIEWPORT", [0, 0] * self.workspaces)
+        self.set_cardinals(
+            self.root, "_NET_WORKAREA", [0, 0, self.width, self.height] * self.workspaces
+        )
+        self.update_client_list()
+        self.display.sync()
+
+    def update_client_list(self):
+        """Publish managed windows."""
+        ids = [window.id for window in self.clients]
+        self.set_cardinals(self.root, "_NET_CLIENT_LIST", ids, Xatom.WINDOW)
+        self.set_cardinals(self.root, "_NET_CLIENT_LIST_STACKING", ids, Xatom.WINDOW)
+
+    def find_client(self, window):
+        """Get managed window object for event window."""
+        for client in self.clients:
+            if client.id == window.id:
+                return client
+        return None
+
+    def on_map_request(self, event):
+        """Manage and map window."""
+        window = event.window
+        if self.find_client(window) is None:
+            self.clients.append(window)
+            self.states[window.id] = set()
+            self.set_cardinals(window, "_NET_WM_DESKTOP", [0])
+            self.set_cardinals(window, "_NET_FRAME_EXTENTS", [0, 0, 0, 0])
+            self.set_cardinals(window, "_NET_WM_STATE", [], Xatom.ATOM)
+            self.update_client_list()
+        window.map()
+
+    def on_configure_request(self, event):
+        """Grant geometry requests as they are."""
+        values = {}
+        for key, mask in (
+            ("x", X.CWX),
+            ("y", X.CWY),
+            ("width", X.CWWidth),
+            ("height", X.CWHeight),
+        ):
+            if event.value_mask & mask:
+                values[key] = getattr(event, key)
+        if values:
+            event.window.configure(**values)
+
+    def on_unmap(self, event):
+        """Forget window."""
+        client = self.find_client(event.window)
+        if client is not None:
+            self.clients.remove(client)
+            self.states.pop(client.id, None)
+            self.restore.pop(client.id, None)
+            self.update_client_list()
+
+    def on_client_message(self, event):
+        """Dispatch EWMH client message."""
+        handler = self.messages.get(event.client_type)
+        if handler is not None:
+            _, data = event.data
+            handler(event.window, data)
+
+    def msg_wm_desktop(self, window, data):
+        """Move window to workspace."""
+        if data[0] < self.workspaces or data[0] == 0xFFFFFFFF:
+            self.set_cardinals(window, "_NET_WM_DESKTOP", [data[0]])
+
+    def msg_current_desktop(self, _, data):
+        """Switch workspace."""
+        if data[0] < self.workspaces:
+            self.set_cardinals(self.root, "_NET_CURRENT_DESKTOP", [data[0]])
+
+    def msg_moveresize(self, window, data):
+        """Move and resize window (gravity is ignored, there are no frames)."""
+        values = {}
+        for bit, key, value in zip(
+            range(8, 12), ("x", "y", "width", "height"), data[1:5]
+        ):
+            if data[0] & (1 << bit):
+                values[key] = value
+        if values:
+            window.configure(**values)
+
+    def msg_wm_state(self, window, data):
+        """Add, remove or toggle window states."""
+        states = self.states.get(window.id)
+        if states is None:
+            return
+        old = set(states)
+        for atom in data[1:3]:
+            if not atom:
+                continue
+            if data[0] == STATE_ADD or (data[0] == STATE_TOGGLE and atom not in states):
+                states.add(atom)
+            else:
+                states.discard(atom)
+        self.set_cardinals(window, "_NET_WM_STATE", states, Xatom.ATOM)
+        self.apply_geometry(window, old, states)
+
+    def apply_geometry(self, window, old, new):
+        """Resize window for maximized and fullscreen states."""
+        big = {
+            self.atoms["_NET_WM_STATE_MAXIMIZED_HORZ"],
+            self.atoms["_NET_WM_STATE_MAXIMIZED_VERT"],
+            self.atoms["_NET_WM_STATE_FULLSCREEN"],
+        }
+        if old & big == new & big:
+            return
+        if not old & big:
+            geom = window.get_geometry()
+            self.restore[window.id] = (geom.x, geom.y, geom.width, geom.height)
+        if not new & big:
+            xpos, ypos, width, height = self.restore.pop(window.id)
+            window.configure(x=xpos, y=ypos, width=width, height=height)
+            return
+        geom = window.get_geometry()
+        xpos, ypos, width, height = self.restore[window.id]
+        if new & {self.atoms["_NET_WM_STATE_FULLSCREEN"]}:
+            xpos, ypos, width, height = 0, 0, self.width, self.height
+        else:
+            if self.atoms["_NET_WM_STATE_MAXIMIZED_HORZ"] in new:
+                xpos, width = 0, self.width
+            if self.atoms["_NET_WM_STATE_MAXIMIZED_VERT"] in new:
+                ypos, height = 0, self.height
+        if (xpos, ypos, width, height) != (geom.x, geom.y, geom.width, geom.height):
+            window.configure(x=xpos, y=ypos, width=width, height=height)
+
+    def msg_active_window(self, window, _):
+        """Raise and focus window."""
+        window.configure(stack_mode=X.Above)
+        window.set_input_focus(X.RevertToPointerRoot, X.CurrentTime)
+        self.set_cardinals(self.root, "_NET_ACTIVE_WINDOW", [window.id], Xatom.WINDOW)
+
+    @staticmethod
+    def msg_close_window(window, _):
+        """Close window."""
+        window.destroy()
+
+    def run(self):
+        """Handle events forever."""
+        while True:
+            event = self.display.next_event()
+            handler = self.handlers.get(event.type)
+            if handler is None:
+                continue
+            try:
+                handler(event)
+            except XError:
+                pass  # Window went away meanwhile
+
+
+def main():
+    """Run window manager."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workspaces", type=int, default=4)
+    args = parser.parse_args()
+
+    display = Display()
+    display.set_error_handler(lambda *_: None)  # Ignore errors of vanished windows
+    wm = MiniWM(display, args.workspaces)
+    wm.setup()
+    wm.run()
+
+
+if __name__ == "__main__":
+    main()
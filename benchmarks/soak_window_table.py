@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Soak benchmark for the state devilspy keeps while running for weeks.
+
+Opens and closes millions of fake windows, some of which never send a close
+event. Windows go through the daemon paths of a screen: queueing until the
+main loop is idle, matching, rate limit buckets, the per-window state table
+and the event log. Memory is checked with tracemalloc to stay flat once every
+bounded structure is saturated. Needs PyGObject, but no X server.
+
+    $ PYTHONPATH=. python benchmarks/soak_window_table.py --windows 2000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from gi.repository import GLib
+
+from devilspy.config import Config
+from devilspy.eventlog import RING_SIZE, BinaryWriter, EventLog
+from devilspy.spy import ScreenSpy, WindowSpy
+from devilspy.windowtable import WindowTable
+
+
+class FakeWindowType:
+    """Stand-in for Wnck.WindowType."""
+
+    value_nick = "normal"
+
+
+class FakeWindow:
+    """Stand-in for Wnck.Window, with the fields the soak config matches."""
+
+    window_type = FakeWindowType()
+
+    def __init__(self, xid, app):
+        self._xid = xid
+        self._app = app
+
+    def get_xid(self):
+        return self._xid
+
+    def get_class_group_name(self):
+        return "Soak-{}".format(self._app)
+
+    def get_name(self):
+        return "Window {}".format(self._xid)
+
+    def get_window_type(self):
+        return self.window_type
+
+    @staticmethod
+    def get_transient():
+        return None
+
+    @staticmethod
+    def get_application():
+        return None
+
+
+class FakeScreen:
+    """Stand-in for Wnck.Screen, signals are emitted by the benchmark."""
+
+    @staticmethod
+    def get_number():
+        return 0
+
+    def connect(self, *args):
+        pass
+
+
+class SoakSpy(WindowSpy):
+    """WindowSpy without screens, X11 worker and signal handlers."""
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, config, max_size, event_log):
+        self._config = config
+        self._print_window_info = False
+        self._no_actions = True  # Actions are only recorded in the event log
+        self.window_table = WindowTable(
+            max_size=max_size, on_discard=WindowSpy._discard_window_record
+        )
+        self.event_log = event_log
+
+    def match_window(self, window, batch):
+        # Per-window state as attached by actions
+        record = self.window_table.get(window.get_xid())
+        record.data["workspace"] = window.get_xid() % 8
+        super().match_window(window, batch)
+
+
+def make_config(rate):
+    """Create config matching every soak window, rate limited per application."""
+    return Config.create(
+        {
+            "soak": {
+                "rules": [{"match": "glob", "field": "class_group", "val": "Soak-*"}],
+                "actions": [{"workspace": 2}, {"maximize": True}],
+                "rate_limit": {"rate": rate, "burst": 1, "mode": "queue"},
+            }
+        },
+        "soak",
+    )
+
+
+def run_main_loop(context):
+    """Dispatch all ready sources, like the daemon does once idle."""
+    while context.iteration(False):
+        pass
+
+
+# pylint: disable=too-many-arguments,too-many-locals
+def soak(windows, max_open, lost_ratio, apps, rate, max_size, burst, samples):
+    """
+    Run soak test.
+
+    Return spy, screen spy and a list of (windows processed, traced bytes,
+    saturated) samples.
+    """
+    context = GLib.MainContext.default()
+    with open(os.devnull, "wb") as devnull:
+        event_log = EventLog(writer=BinaryWriter(devnull))
+        spy = SoakSpy(make_config(rate), max_size, event_log)
+        screen = FakeScreen()
+        screen_spy = ScreenSpy(spy, screen)
+        rng = random.Random(0)
+        open_windows = []
+        measurements = []
+        sample_every = max(1, windows // samples)
+
+        for xid in range(1, windows + 1):
+            window = FakeWindow(xid, rng.randrange(apps))
+            screen_spy.on_window_opened(screen, window)
+            open_windows.append(window)
+
+            # window-closed for a random open window, some close events get lost
+            if len(open_windows) > max_open:
+                closed = open_windows.pop(rng.randrange(len(open_windows)))
+                if rng.random() >= lost_ratio:
+                    screen_spy.on_window_closed(screen, closed)
+
+            if xid % burst == 0:
+                run_main_loop(context)
+            if xid % sample_every == 0:
+                run_main_loop(context)
+                event_log.flush()
+                saturated = (
+                    len(spy.window_table) == max_size and len(event_log) == RING_SIZE
+                )
+                traced = tracemalloc.get_traced_memory()[0]
+                measurements.append((xid, traced, saturated))
+
+    return spy, screen_spy, measurements
+
+
+def main():
+    """Run benchmark and check memory growth."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--windows", type=int, default=2000000)
+    parser.add_argument("--max-open", type=int, default=200)
+    parser.add_argument("--lost-ratio", type=float, default=0.01)
+    parser.add_argument(
+        "--apps",
+        type=int,
+        default=1000,
+        help="Distinct applications, each with its own rate limit bucket.",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=1000, help="Rate limit per application (1/s)."
+    )
+    parser.add_argument(
+        "--max-size",
+        type=int,
+        default=1024,
+        help="Size limit of the per-window state table.",
+    )
+    parser.add_argument(
+        "--burst", type=int, default=8, help="Windows opened per main loop iteration."
+    )
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument(
+        "--tolerance",
+        type=int,
+        default=256 * 1024,
+        help="Allowed memory growth in bytes once saturated.",
+    )
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    spy, screen_spy, measurements = soak(
+        args.windows,
+        args.max_open,
+        args.lost_ratio,
+        args.apps,
+        args.rate,
+        args.max_size,
+        args.burst,
+        args.samples,
+    )
+    duration = time.perf_counter() - start
+    tracemalloc.stop()
+
+    for processed, traced, saturated in measurements:
+        print(
+            "{:>12,d} windows  {:>12,d} bytes{}".format(
+                processed, traced, "" if saturated else "  (warm-up)"
+            )
+        )
+    counters = screen_spy.stats.counters
+    print(
+        "{:,d} windows in {:.1f} s, {:,d} tracked, {:,d} evicted, "
+        "{:,d} queued, {:,d} skipped, {:,d} dropped by rate limit".format(
+            args.windows,
+            duration,
+            len(spy.window_table),
+            spy.window_table.evicted,
+            counters["rate_limit_queued"],
+            counters["rate_limit_skipped"],
+            counters["rate_limit_dropped"],
+        )
+    )
+
+    # Only measure once all bounded structures are full, and stayed full
+    steady = []
+    for _, traced, saturated in measurements:
+        if saturated:
+            steady.append(traced)
+        else:
+            steady = []
+    if len(steady) < 2:
+        print(
+            "FAIL: state never saturated, "
+            "increase --windows or decrease --max-size."
+        )
+        sys.exit(1)
+    growth = max(steady) - min(steady)
+    print(
+        "steady-state growth {:,d} bytes over {:d} samples".format(
+            growth, len(steady)
+        )
+    )
+
+    if growth > args.tolerance:
+        print("FAIL: memory is not flat.")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Windows opened during one main loop iteration are handled as a batch."""
+
+import re
+
+from devilspy.config.actions import get_server_time
+from devilspy.logger import main_logger
+from devilspy.placement import Placement
+
+logger = main_logger.getChild("batch")
+
+STARTUP_TIME_REGEX = re.compile(r"_TIME(\d+)$")
+
+
+def get_startup_timestamp(window):
+    """Extract X server timestamp from startup notification ID (0 if none)."""
+    application = window.get_application()
+    if not application:
+        return 0
+    startup_id = application.get_startup_id()
+    if not startup_id:
+        return 0
+    match = STARTUP_TIME_REGEX.search(startup_id)
+    if match:
+        return int(match.group(1))
+    return 0
+
+
+class EventBatch:
+    """
+    State shared by all actions carried out on a batch of new windows.
+
+    The X server timestamp is obtained at most once per batch. Timestamps from
+    startup notification are preferred, a server round trip is the last resort.
+    """
+
+    def __init__(self, spy, screen, windows, stats):
+        self.screen = screen
+        self.windows = windows
+        self.stats = stats
+        self._spy = spy
+        self._timestamp = None
+        self._placement = None
+
+    @property
+    def window_table(self):
+        """Per-window state table."""
+        return self._spy.window_table
+
+    @property
+    def event_log(self):
+        """Structured log of carried out actions."""
+        return self._spy.event_log
+
+    @property
+    def geometry(self):
+        """Cached monitor layout of the screen."""
+        return self._spy.geometry[self.screen.get_number()]
+
+    @property
+    def worker(self):
+        """Worker thread for blocking Xlib requests."""
+        return self._spy.worker
+
+    @property
+    def placement(self):
+        """Occupied space per workspace, shared by placement actions."""
+        if self._placement is None:
+            self._placement = Placement(self.screen, self.windows, self.geometry)
+        return self._placement
+
+    def submit_x11(self, window, func, on_done=None):
+        """
+        Run func(xdisplay, xid) for window on the X11 worker thread.
+
+        on_done() is called on the main loop once the job succeeded or failed.
+        """
+        xid = window.get_xid()
+
+        def on_result(_):
+            self.stats.incr("x11_jobs_done")
+            if on_done is not None:
+                on_done()
+
+        def on_error(error):
+            self.stats.incr("x11_jobs_failed")
+            logger.warning("X11 request for window 0x%x failed: %s", xid, error)
+            if on_done is not None:
+                on_done()
+
+        self.stats.incr("x11_jobs_submitted")
+        self.worker.submit(xid, func, on_result, on_error)
+
+    @property
+    def timestamp(self):
+        """X server timestamp shared by all actions in this batch."""
+        if self._timestamp is None:
+            self._timestamp = max(
+                (get_startup_timestamp(window) for window in self.windows), default=0
+            )
+            if not self._timestamp and self.windows:
+                self._timestamp = get_server_time(self.screen, self.windows[0])
+        return self._timestamp
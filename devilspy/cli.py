@@ -1,14 +1,25 @@
 """Command line interface."""
 
+import json
 import logging
 import os
 import os.path
+import signal
 import sys
 
 import click
+import yaml
 from gi.repository import Gdk, GLib
 
 from devilspy.config import Config
+from devilspy.config.lint import lint_config
+from devilspy.control import (
+    ControlError,
+    ControlServer,
+    get_default_socket_path,
+    send_request,
+)
+from devilspy.eventlog import WRITERS, EventLog, format_record, read_records
 from devilspy.logger import main_logger
 from devilspy.meta import DESCRIPTION, PROGRAM_NAME, WEBSITE, VERSION
 from devilspy.spy import WindowSpy
@@ -43,7 +54,7 @@ def cb_print_window_info(ctx, param, print_window_info):
     return print_window_info
 
 
-class CustomEpilogCommand(click.Command):
+class CustomEpilogGroup(click.Group):
     """Format epilog in a custom way."""
 
     def format_epilog(self, _, formatter):
@@ -54,7 +65,12 @@ class CustomEpilogCommand(click.Command):
                 formatter.write_text(line)
 
 
-@click.command(cls=CustomEpilogCommand, help=DESCRIPTION, epilog=get_epilog())
+@click.group(
+    cls=CustomEpilogGroup,
+    help=DESCRIPTION,
+    epilog=get_epilog(),
+    invoke_without_command=True,
+)
 @click.option(
     "-c",
     "--config",
@@ -64,6 +80,15 @@ class CustomEpilogCommand(click.Command):
     type=click.Path(dir_okay=False),
 )
 @click.option("-f", "--fork", is_flag=True, help="Fork into background.")
+@click.option(
+    "-s",
+    "--screen",
+    "screens",
+    multiple=True,
+    type=click.IntRange(min=0),
+    help="Screen number to watch (repeat for several screens), overrides config "
+    "'screens'. [default: default screen]",
+)
 @click.option(
     "-n", "--no-actions", is_flag=True, help="Do not carry out any window actions."
 )
@@ -74,6 +99,33 @@ class CustomEpilogCommand(click.Command):
     is_flag=True,
     help="Print information about new windows.",
 )
+@click.option(
+    "-e",
+    "--event-log",
+    "event_log_file",
+    type=click.File("ab"),
+    help="Stream carried out actions to file.",
+)
+@click.option(
+    "--event-log-format",
+    default="binary",
+    show_default=True,
+    type=click.Choice(sorted(WRITERS)),
+    help="Format of event log file.",
+)
+@click.option(
+    "--control",
+    "enable_control",
+    is_flag=True,
+    help="Accept requests on the control socket.",
+)
+@click.option(
+    "--control-socket",
+    default=get_default_socket_path,
+    show_default="$XDG_RUNTIME_DIR/devilspy/control.sock",
+    type=click.Path(dir_okay=False),
+    help="Control socket path.",
+)
 @click.option(
     "-d",
     "--debug",
@@ -83,8 +135,25 @@ class CustomEpilogCommand(click.Command):
     help="Print debug messages.",
 )
 @click.version_option(VERSION)
-def cli(config, fork, no_actions, print_window_info):
+@click.pass_context
+# pylint: disable=too-many-arguments
+def cli(
+    ctx,
+    config,
+    fork,
+    screens,
+    no_actions,
+    print_window_info,
+    event_log_file,
+    event_log_format,
+    enable_control,
+    control_socket,
+):
     """Instantiate and start an devilspy."""
+    ctx.obj = {"config": config, "control_socket": control_socket}
+    if ctx.invoked_subcommand is not None:
+        return
+
     if fork:
         pid = os.fork()
         if pid > 0:
@@ -96,12 +165,94 @@ def cli(config, fork, no_actions, print_window_info):
     Gdk.init([])
     main_loop = GLib.MainLoop()
 
+    event_log = None
+    if event_log_file:
+        event_log = EventLog(writer=WRITERS[event_log_format](event_log_file))
+
+    control_server = None
+    if enable_control:
+        try:
+            control_server = ControlServer(parsed_config, control_socket)
+        except ControlError as error:
+            raise click.ClickException(str(error))
+
+    if not screens and parsed_config:
+        screens = parsed_config.screens
+    spy = WindowSpy(parsed_config, print_window_info, no_actions, screens, event_log)
+
+    def on_sigterm():
+        main_loop.quit()  # Shut down like on Ctrl-C
+        return False  # Notify GLib to remove this signal source
+
+    GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGTERM, on_sigterm)
     try:
-        WindowSpy(
-            parsed_config, print_window_info, no_actions,
-        )
         main_loop.run()
     except KeyboardInterrupt:
         main_loop.quit()
+    if control_server:
+        control_server.stop()
+    spy.stop()
 
     sys.exit(0)
+
+
+@cli.command()
+@click.option("--perf", is_flag=True, help="Look for performance issues.")
+@click.option(
+    "--top",
+    default=10,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Number of most expensive entries to list.",
+)
+@click.pass_obj
+def check(obj, perf, top):
+    """Check configuration file."""
+    parsed_config = Config.load_yaml_file(obj["config"])
+    if parsed_config is None:
+        sys.exit(1)
+    click.echo("{} entries OK.".format(len(parsed_config.entries)))
+    if not perf:
+        return
+
+    findings, costs = lint_config(parsed_config)
+    for finding in findings:
+        click.echo("{}: {}".format(finding.entry, finding.message))
+        if finding.suggestion:
+            click.echo("  Suggestion: {}".format(finding.suggestion))
+
+    if costs and top:
+        click.echo("Estimated per-window cost (1 = one string comparison):")
+        ranked = sorted(costs.items(), key=lambda item: item[1], reverse=True)
+        for name, cost in ranked[:top]:
+            click.echo("  {:>6d}  {}".format(cost, name))
+        click.echo("  {:>6d}  total".format(sum(costs.values())))
+
+    if findings:
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument("event_log_file", type=click.File("rb"))
+def events(event_log_file):
+    """Print event log file written with --event-log."""
+    for record in read_records(event_log_file):
+        click.echo(format_record(record))
+
+
+@cli.command()
+@click.argument("request")
+@click.pass_obj
+def control(obj, request):
+    """
+    Send request to a running devilspy (started with --control).
+
+    REQUEST is a JSON or YAML object, e.g. '{command: list}'.
+    """
+    try:
+        response = send_request(obj["control_socket"], yaml.safe_load(request))
+    except (OSError, ValueError) as error:
+        raise click.ClickException(str(error))
+    click.echo(json.dumps(response, indent=2))
+    if not response.get("ok"):
+        sys.exit(1)
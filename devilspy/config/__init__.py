@@ -3,12 +3,37 @@
 import yaml
 
 from devilspy.config.abc import AbstractBaseConfigEntity
-from devilspy.config.entry import Entry
+from devilspy.config.entry import Entry, validate_window_types
 from devilspy.config.errors import ConfigValidationError, InvalidEntryError
 from devilspy.logger import main_logger
+from devilspy.matcher import MatchEngine
+from devilspy.windowinfo import WINDOW_TYPES
 
 logger = main_logger.getChild("config")
 
+# Top-level key for the window types entries match by default
+WINDOW_TYPES_KEY = "window_types"
+# Top-level key for the screens to watch, unless given on the command line
+SCREENS_KEY = "screens"
+
+
+def has_setting(data, key):
+    """Check if config has top-level setting key (a mapping is an entry)."""
+    return key in data and not isinstance(data[key], dict)
+
+
+def validate_screens(screens):
+    """Validate screen numbers given as int or list, return them as list."""
+    if not isinstance(screens, list):
+        screens = [screens]
+    if not screens or not all(
+        type(screen) is int and screen >= 0 for screen in screens
+    ):
+        raise ConfigValidationError(
+            "Value of 'screens' must be one or more screen numbers."
+        )
+    return screens
+
 
 class Config(AbstractBaseConfigEntity):
     """Configuration class holds and validates rules."""
@@ -16,6 +41,9 @@ class Config(AbstractBaseConfigEntity):
     def __init__(self, filepath):
         self._filepath = filepath
         self.entries = []
+        self.engine = None
+        self.window_types = WINDOW_TYPES  # default of entries
+        self.screens = []  # default screen if empty
 
     @classmethod
     def load_yaml_file(cls, filepath):
@@ -24,7 +52,7 @@ class Config(AbstractBaseConfigEntity):
             with open(filepath, "r") as configfile:
                 data = yaml.safe_load(configfile.read())
                 config = cls.create(data, filepath)
-                logger.debug("Configuration loaded: {}".format(config))
+                logger.debug("Configuration loaded: %s", config)
                 return config
         except FileNotFoundError:
             logger.warning("Config file not found.")
@@ -35,21 +63,77 @@ class Config(AbstractBaseConfigEntity):
         return None
 
     def parse(self, data):
+        if has_setting(data, WINDOW_TYPES_KEY):
+            self.window_types = validate_window_types(data[WINDOW_TYPES_KEY])
+        if has_setting(data, SCREENS_KEY):
+            self.screens = validate_screens(data[SCREENS_KEY])
+        data = {
+            key: val
+            for key, val in data.items()
+            if not (key in (WINDOW_TYPES_KEY, SCREENS_KEY) and has_setting(data, key))
+        }
         for entry_name, entry_data in data.items():
             try:
-                self.entries.append(Entry.create(entry_data, entry_name))
+                self.entries.append(
+                    Entry.create(entry_data, entry_name, self.window_types)
+                )
             except InvalidEntryError as error:
                 logger.warning("Invalid entry: '%s': %s", entry_name, error.message)
 
         if not self.entries:
             logger.warning("No entries in config.")
 
+        self.engine = MatchEngine(self.entries)
+        logger.debug(
+            "Window fields referenced: %s", ", ".join(sorted(self.engine.fields))
+        )
+
     @classmethod
     def validate(cls, data):
         if not isinstance(data, dict):
             raise InvalidEntryError("Config must be of type dict.")
+        if has_setting(data, WINDOW_TYPES_KEY):
+            validate_window_types(data[WINDOW_TYPES_KEY])
+        if has_setting(data, SCREENS_KEY):
+            validate_screens(data[SCREENS_KEY])
         return data
 
+    def get_entry(self, name):
+        """Get entry by name (None if not found)."""
+        for entry in self.entries:
+            if entry.name == name:
+                return entry
+        return None
+
+    def add_entry(self, name, data):
+        """Parse and add a single entry, updating only its part of the engine."""
+        if self.get_entry(name) is not None:
+            raise InvalidEntryError("Entry '{}' already exists.".format(name))
+        entry = Entry.create(data, name, self.window_types)
+        self.engine.add_entry(entry)  # Raises before anything is changed
+        self.entries.append(entry)
+        return entry
+
+    def replace_entry(self, name, data):
+        """Parse and replace a single entry, keeping its position."""
+        old_entry = self.get_entry(name)
+        if old_entry is None:
+            raise InvalidEntryError("Entry '{}' does not exist.".format(name))
+        entry = Entry.create(data, name, self.window_types)
+        self.engine.replace_entry(old_entry, entry)  # Raises before anything is changed
+        self.entries[self.entries.index(old_entry)] = entry
+        old_entry.clear_rate_limit()
+        return entry
+
+    def remove_entry(self, name):
+        """Remove a single entry."""
+        entry = self.get_entry(name)
+        if entry is None:
+            raise InvalidEntryError("Entry '{}' does not exist.".format(name))
+        self.engine.remove_entry(entry)
+        self.entries.remove(entry)
+        entry.clear_rate_limit()
+
     def __str__(self):
         ret = "\n  Config file: {}\n".format(self._filepath)
         for entry in self.entries:
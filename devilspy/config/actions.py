@@ -4,11 +4,21 @@ from abc import ABCMeta, abstractmethod
 import struct
 
 from gi.repository import Gdk, GdkX11, GLib, Wnck
-from Xlib.display import Display as XDisplay
 from Xlib import Xatom
 
 from devilspy.config.abc import AbstractBaseConfigEnumerableEntity
 from devilspy.config.errors import InvalidActionError
+from devilspy.placement import DEFAULT_CASCADE_STEP
+from devilspy.windowstate import apply_state
+
+
+# Monitor of actions placing windows relative to the monitor the window is on
+MONITOR_CURRENT = "current"
+
+
+# _MOTIF_WM_HINTS flag and value for window decorations
+MWM_HINTS_DECORATIONS = 1 << 1
+MWM_DECOR_ALL = 1 << 0
 
 
 def get_gdk_window(window):
@@ -17,6 +27,21 @@ def get_gdk_window(window):
     return GdkX11.X11Window.foreign_new_for_display(gdk_display, xid)
 
 
+def get_server_time(screen, window):
+    """Get current X server time with a round trip."""
+    gdk_window = None
+    if screen == Wnck.Screen.get_default():
+        gdk_window = get_gdk_window(window)
+    if gdk_window is None:
+        # Gdk only knows windows on the default screen, but all screens of a
+        # display share the server time
+        gdk_window = Gdk.get_default_root_window()
+        gdk_window.set_events(
+            gdk_window.get_events() | Gdk.EventMask.PROPERTY_CHANGE_MASK
+        )
+    return GdkX11.x11_get_server_time(gdk_window)
+
+
 class AbstractBaseAction(AbstractBaseConfigEnumerableEntity, metaclass=ABCMeta):
     """Abstract base class for all actions."""
 
@@ -40,7 +65,7 @@ class AbstractBaseAction(AbstractBaseConfigEnumerableEntity, metaclass=ABCMeta):
                 raise InvalidActionError(cls, "Could not parse.")
         try:
             return ACTION_MAPPING[name]
-        except KeyError:
+        except (KeyError, TypeError):  # TypeError for unhashable names
             vals = ACTION_MAPPING.keys()
             raise InvalidActionError(
                 cls, "Invalid value for 'name'. Must be one of {}.".format(vals)
@@ -91,22 +116,107 @@ class AbstractBaseAction(AbstractBaseConfigEnumerableEntity, metaclass=ABCMeta):
             raise InvalidActionError(cls, msg)
 
     @abstractmethod
-    def run(self, window, screen):
+    def run(self, window, batch):
         """Carry out window action."""
 
     def __str__(self):
         return "  {}: arg={}".format(type(self).__name__, self.arg)
 
 
+class AbstractBaseStateAction(AbstractBaseAction, metaclass=ABCMeta):
+    """
+    Abstract base class for actions that (un)set window state flags.
+
+    Consecutive state actions of an entry are planned together and only the
+    resulting changes are sent to the window manager.
+    """
+
+    states = ()
+
+    def plan(self, desired):
+        """Add desired window state to plan."""
+        for state in self.states:
+            desired[state] = self.arg
+        return desired
+
+    def run(self, window, batch):
+        apply_state(window, batch, self.plan({}))
+
+
+class AbstractBaseX11Action(AbstractBaseAction, metaclass=ABCMeta):
+    """
+    Abstract base class for actions carried out with Xlib.
+
+    Xlib requests are blocking and run on the X11 worker thread. Entries only
+    carry out further actions on the window once the request is done.
+    """
+
+    def run(self, window, batch):
+        batch.submit_x11(window, self.run_x11)
+
+    @abstractmethod
+    def run_x11(self, xdisplay, xid):
+        """Carry out window action (runs on X11 worker thread)."""
+
+
+class AbstractBaseMonitorAction(AbstractBaseAction, metaclass=ABCMeta):
+    """
+    Abstract base class for actions placing windows relative to a monitor.
+
+    The optional key 'monitor' is a monitor number or 'current' for the
+    monitor the window is on.
+    """
+
+    default_monitor = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.monitor = None
+
+    @classmethod
+    def validate(cls, data):
+        data = super().validate(data)
+        monitor = data.get("monitor", cls.default_monitor)
+        # None (the whole screen) is only valid for actions defaulting to it
+        if not (
+            monitor == MONITOR_CURRENT
+            or (type(monitor) is int and monitor >= 0)
+            or (monitor is None and cls.default_monitor is None)
+        ):
+            msg = "Field 'monitor' must be a monitor number or '{}'.".format(
+                MONITOR_CURRENT
+            )
+            raise InvalidActionError(cls, msg)
+        data["monitor"] = monitor
+        return data
+
+    def parse(self, data):
+        super().parse(data)
+        self.monitor = data["monitor"]
+
+    def get_area(self, window, batch):
+        """Get work area of configured monitor (None for the whole screen)."""
+        if self.monitor is None:
+            return None
+        if self.monitor == MONITOR_CURRENT:
+            return batch.geometry.get_window_monitor(window).workarea
+        monitor = batch.geometry.get_monitor(self.monitor)
+        if monitor is None:
+            monitor = batch.geometry.get_window_monitor(window)
+        return monitor.workarea
+
+    def __str__(self):
+        return "{} monitor={}".format(super().__str__(), self.monitor)
+
+
 class ActivateAction(AbstractBaseAction):
     """Activate window."""
 
     name = "activate"
     arg_type = (bool)
 
-    def run(self, window, screen):
-        gdk_window = get_gdk_window(window)
-        window.activate(GdkX11.x11_get_server_time(gdk_window))
+    def run(self, window, batch):
+        window.activate(batch.timestamp)
 
 
 class ActivateWorkspaceAction(AbstractBaseAction):
@@ -119,41 +229,70 @@ class ActivateWorkspaceAction(AbstractBaseAction):
         super().__init__(*args, **kwargs)
         self.workspace_idx = None
 
-    def run(self, window, screen):
-        space = screen.get_workspace(self.arg)
+    def run(self, window, batch):
+        space = batch.screen.get_workspace(self.arg)
         if space:
-            active_space = screen.get_active_workspace()
+            active_space = batch.screen.get_active_workspace()
             if active_space and space == active_space:
                 return
-            # Delay workspace switch or some window managers have display issues
-            gdk_window = get_gdk_window(window)
-            timestamp = GdkX11.x11_get_server_time(gdk_window)
-            GLib.timeout_add(100, self._delayed_activate_workspace, space, timestamp)
+            # Delay workspace switch or some window managers have display issues.
+            # The timeout belongs to the window and is cancelled if it closes.
+            record = batch.window_table.get(window.get_xid())
+            if self.name in record.sources:
+                GLib.source_remove(record.sources[self.name])
+            record.sources[self.name] = GLib.timeout_add(
+                100,
+                self._delayed_activate_workspace,
+                batch.screen,
+                self.arg,
+                batch.timestamp,
+                record,
+            )
 
-    @staticmethod
-    def _delayed_activate_workspace(space, timestamp):
+    def _delayed_activate_workspace(self, screen, space_idx, timestamp, record):
         """Delayed workspace switch."""
-        space.activate(timestamp)
+        del record.sources[self.name]
+        space = screen.get_workspace(space_idx)
+        if space:
+            space.activate(timestamp)
         return False  # Notify GLib to cancel this timeout
 
 
-class CenterAction(AbstractBaseAction):
-    """Center window."""
+class CascadeAction(AbstractBaseAction):
+    """Cascade window with other windows on its workspace."""
+
+    name = "cascade"
+    arg_type = [int, int]
+
+    @classmethod
+    def validate(cls, data):
+        data = super().validate(data)
+        if any(step < 0 for step in data["arg"]):
+            raise InvalidActionError(cls, "Field 'arg' must not be negative.")
+        return data
+
+    def run(self, window, batch):
+        batch.placement.cascade(window, *self.arg)
+        batch.stats.incr("windows_placed")
+
+
+class CenterAction(AbstractBaseMonitorAction):
+    """Center window on a monitor."""
 
     name = "center"
     arg_type = bool
+    default_monitor = MONITOR_CURRENT
 
-    def run(self, window, screen):
+    def run(self, window, batch):
+        if not self.arg:
+            return
         _, _, win_w, win_h = window.get_geometry()
-        space = window.get_workspace()
-        if not space:
-            space = screen.get_workspace(0)
-        space_w = space.get_width()
-        space_h = space.get_height()
-        xpos = round((space_w - win_w) / 2)
-        ypos = round((space_h - win_h) / 2)
+        area = self.get_area(window, batch)
+        xpos = area.x + round((area.width - win_w) / 2)
+        ypos = area.y + round((area.height - win_h) / 2)
+        # Position refers to the frame, as does the geometry it is derived from
         window.set_geometry(
-            Wnck.WindowGravity.STATIC,
+            Wnck.WindowGravity.NORTHWEST,
             Wnck.WindowMoveResizeMask.X | Wnck.WindowMoveResizeMask.Y,
             xpos,
             ypos,
@@ -162,92 +301,77 @@ class CenterAction(AbstractBaseAction):
         )
 
 
-class DecorateAction(AbstractBaseAction):
+class DecorateAction(AbstractBaseX11Action):
     """(Un)decorate window."""
 
     name = "decorate"
     arg_type = bool
 
-    def run(self, window, screen):
-        gdk_window = get_gdk_window(window)
-        if self.arg:
-            gdk_window.set_decorations(Gdk.WMDecoration.ALL)
-        else:
-            gdk_window.set_decorations(0)
+    def run_x11(self, xdisplay, xid):
+        """Set Motif decoration hints like Gdk does, for windows on any screen."""
+        xwindow = xdisplay.create_resource_object("window", xid)
+        atom = xdisplay.intern_atom("_MOTIF_WM_HINTS")
+        # flags, functions, decorations, input mode, status
+        hints = [MWM_HINTS_DECORATIONS, 0, MWM_DECOR_ALL if self.arg else 0, 0, 0]
+        xwindow.change_property(atom, atom, 32, hints)
 
 
-class FullscreenAction(AbstractBaseAction):
+class FullscreenAction(AbstractBaseStateAction):
     """(Un)set window fullscreen state."""
 
     name = "fullscreen"
     arg_type = bool
+    states = ("fullscreen",)
 
-    def run(self, window, screen):
-        if self.arg and not window.is_fullscreen():
-            window.set_fullscreen(True)
-        elif window.is_fullscreen():
-            window.set_fullscreen(False)
 
+class GridAction(AbstractBaseAction):
+    """Resize window to the least occupied cell of a grid on its workspace."""
 
-class MaximizeAction(AbstractBaseAction):
+    name = "grid"
+    arg_type = [int, int]
+
+    @classmethod
+    def validate(cls, data):
+        data = super().validate(data)
+        if any(count < 1 for count in data["arg"]):
+            raise InvalidActionError(cls, "Field 'arg' must be positive.")
+        return data
+
+    def run(self, window, batch):
+        batch.placement.grid(window, *self.arg)
+        batch.stats.incr("windows_placed")
+
+
+class MaximizeAction(AbstractBaseStateAction):
     """(Un)maximize window."""
 
     name = "maximize"
     arg_type = bool
-
-    def run(self, window, screen):
-        if self.arg:
-            if not window.is_maximized():
-                window.maximize()
-        else:
-            if window.is_maximized():
-                window.unmaximize()
+    states = ("maximized_h", "maximized_v")
 
 
-class MaximizeHAction(AbstractBaseAction):
+class MaximizeHAction(AbstractBaseStateAction):
     """(Un)maximize window horizontally."""
 
     name = "maximize_h"
     arg_type = bool
-
-    def run(self, window, screen):
-        if self.arg:
-            if not window.is_maximized_horizontally():
-                window.maximize_horizontally()
-        else:
-            if window.is_maximized_horizontally():
-                window.unmaximize_horizontally()
+    states = ("maximized_h",)
 
 
-class MaximizeVAction(AbstractBaseAction):
+class MaximizeVAction(AbstractBaseStateAction):
     """(Un)maximize window vertically."""
 
     name = "maximize_v"
     arg_type = bool
+    states = ("maximized_v",)
 
-    def run(self, window, screen):
-        if self.arg:
-            if not window.is_maximized_vertically():
-                window.maximize_vertically()
-        else:
-            if window.is_maximized_vertically():
-                window.unmaximize_vertically()
 
-
-class MinimizeAction(AbstractBaseAction):
+class MinimizeAction(AbstractBaseStateAction):
     """(Un)minimize window vertically."""
 
     name = "minimize"
     arg_type = bool
-
-    def run(self, window, screen):
-        if self.arg:
-            if not window.is_minimized():
-                window.minimize()
-        else:
-            if window.is_minimized():
-                gdk_window = get_gdk_window(window)
-                window.unminimize(GdkX11.x11_get_server_time(gdk_window))
+    states = ("minimized",)
 
 
 class OnTopAction(AbstractBaseAction):
@@ -256,7 +380,7 @@ class OnTopAction(AbstractBaseAction):
     name = "on_top"
     arg_type = (bool, str)
 
-    def run(self, window, screen):
+    def run(self, window, batch):
         if type(self.arg) in (bool,):
             if self.arg:
                 window.make_above()
@@ -267,77 +391,69 @@ class OnTopAction(AbstractBaseAction):
             window.make_above()
 
 
-class OpacityAction(AbstractBaseAction):
+class OpacityAction(AbstractBaseX11Action):
     """Set window opacity."""
 
     name = "opacity"
     arg_type = float
 
-    def run(self, window, screen):
+    def run_x11(self, xdisplay, xid):
+        """Set opacity property (runs on X11 worker thread)."""
         opacity = max(0.0, min(1.0, self.arg))
-        xdisplay = XDisplay()
-        xwindow = xdisplay.create_resource_object("window", window.get_xid())
+        xwindow = xdisplay.create_resource_object("window", xid)
         atom = xdisplay.intern_atom("_NET_WM_WINDOW_OPACITY")
         data = struct.pack("L", int(4294967295 * opacity))
         xwindow.change_property(atom, Xatom.CARDINAL, 32, data)
-        xdisplay.sync()
 
 
-class PinAction(AbstractBaseAction):
+class PinAction(AbstractBaseStateAction):
     """(Un)pin window to all workspaces."""
 
     name = "pin"
     arg_type = bool
-
-    def run(self, window, screen):
-        if self.arg and not window.is_pinned():
-            window.pin()
-        elif window.is_pinned():
-            window.unpin()
+    states = ("pinned",)
 
 
-class PositionWMAction(AbstractBaseAction):
-    """Set window position using window manager."""
+class PositionWMAction(AbstractBaseMonitorAction):
+    """Set window position using window manager, optionally relative to a monitor."""
 
     name = "position_wm"
     arg_type = [int, int]
 
-    def run(self, window, screen):
+    def run(self, window, batch):
+        xpos, ypos = self.arg
+        area = self.get_area(window, batch)
+        if area is not None:
+            xpos += area.x
+            ypos += area.y
         window.set_geometry(
             Wnck.WindowGravity.STATIC,
             Wnck.WindowMoveResizeMask.X | Wnck.WindowMoveResizeMask.Y,
-            self.arg[0],
-            self.arg[1],
+            xpos,
+            ypos,
             -1,
             -1,
         )
 
 
-class PositionX11Action(AbstractBaseAction):
+class PositionX11Action(AbstractBaseX11Action):
     """Set window position using X11."""
 
     name = "position_x11"
     arg_type = [int, int]
 
-    def run(self, window, screen):
-        xid = window.get_xid()
-        xdisplay = XDisplay()
+    def run_x11(self, xdisplay, xid):
+        """Move window (runs on X11 worker thread)."""
         xwindow = xdisplay.create_resource_object("window", xid)
         xwindow.configure(x=self.arg[0], y=self.arg[1])
-        xdisplay.sync()
 
 
-class ShadeAction(AbstractBaseAction):
+class ShadeAction(AbstractBaseStateAction):
     """(Un)shade window."""
 
     name = "shade"
     arg_type = bool
-
-    def run(self, window, screen):
-        if self.arg:
-            window.shade()
-        else:
-            window.unshade()
+    states = ("shaded",)
 
 
 class SizeAction(AbstractBaseAction):
@@ -346,7 +462,7 @@ class SizeAction(AbstractBaseAction):
     name = "size"
     arg_type = [int, int]
 
-    def run(self, window, screen):
+    def run(self, window, batch):
         window.set_geometry(
             Wnck.WindowGravity.CURRENT,
             Wnck.WindowMoveResizeMask.WIDTH | Wnck.WindowMoveResizeMask.HEIGHT,
@@ -357,43 +473,42 @@ class SizeAction(AbstractBaseAction):
         )
 
 
-class SkipPagerAction(AbstractBaseAction):
+class SkipPagerAction(AbstractBaseStateAction):
     """Set skip window in pager."""
 
     name = "skip_pager"
     arg_type = bool
-
-    def run(self, window, screen):
-        if self.arg and not window.is_skip_pager():
-            window.set_skip_pager(True)
-        elif window.is_skip_pager():
-            window.set_skip_pager(False)
+    states = ("skip_pager",)
 
 
-class SkipTasklistAction(AbstractBaseAction):
+class SkipTasklistAction(AbstractBaseStateAction):
     """Set skip window in task list."""
 
     name = "skip_tasklist"
     arg_type = bool
+    states = ("skip_tasklist",)
 
-    def run(self, window, screen):
-        if self.arg and not window.is_skip_tasklist():
-            window.set_skip_tasklist(True)
-        elif window.is_skip_tasklist():
-            window.set_skip_tasklist(False)
 
-
-class StickAction(AbstractBaseAction):
+class StickAction(AbstractBaseStateAction):
     """(Un)stick window, keep window position fixed even when the workspace or viewport scrolls."""
 
     name = "stick"
     arg_type = bool
+    states = ("sticky",)
+
+
+class TileAction(AbstractBaseAction):
+    """Move window to a free spot on its workspace, cascade if there is none."""
+
+    name = "tile"
+    arg_type = bool
 
-    def run(self, window, screen):
-        if self.arg and not window.is_sticky():
-            window.stick()
-        elif window.is_sticky():
-            window.unstick()
+    def run(self, window, batch):
+        if not self.arg:
+            return
+        if not batch.placement.tile(window):
+            batch.placement.cascade(window, *DEFAULT_CASCADE_STEP)
+        batch.stats.incr("windows_placed")
 
 
 class WorkspaceAction(AbstractBaseAction):
@@ -402,18 +517,21 @@ class WorkspaceAction(AbstractBaseAction):
     name = "workspace"
     arg_type = int
 
-    def run(self, window, screen):
-        space = screen.get_workspace(self.arg)
+    def run(self, window, batch):
+        space = batch.screen.get_workspace(self.arg)
         if space and space != window.get_workspace():
             window.move_to_workspace(space)
+            batch.placement.set_workspace(window, space)
 
 
 ACTION_CLASSES = (
     ActivateAction,
     ActivateWorkspaceAction,
+    CascadeAction,
     CenterAction,
     DecorateAction,
     FullscreenAction,
+    GridAction,
     MaximizeAction,
     MaximizeHAction,
     MaximizeVAction,
@@ -428,6 +546,7 @@ ACTION_CLASSES = (
     SkipPagerAction,
     SkipTasklistAction,
     StickAction,
+    TileAction,
     WorkspaceAction,
 )
 ACTION_MAPPING = {cls.name: cls for cls in ACTION_CLASSES}
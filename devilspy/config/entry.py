@@ -1,23 +1,49 @@
 """Configuration entry holding a set of rules and actions."""
 
-from devilspy.config.actions import AbstractBaseAction
+import time
+
+from devilspy.config.actions import (
+    AbstractBaseAction,
+    AbstractBaseStateAction,
+    AbstractBaseX11Action,
+)
 from devilspy.config.errors import (
     InvalidActionError,
     InvalidEntryError,
+    InvalidRateLimitError,
     InvalidRuleError,
 )
 from devilspy.config.abc import AbstractBaseConfigEntity
+from devilspy.config.ratelimit import RateLimit
 from devilspy.config.rules import AbstractBaseRule
 from devilspy.logger import main_logger
+from devilspy.windowinfo import WINDOW_TYPES
+from devilspy.windowstate import apply_state
 
 logger = main_logger.getChild("config.entry")
 
 
+def validate_window_types(window_types):
+    """Validate window types given as string or list, return them as list."""
+    if isinstance(window_types, str):
+        window_types = [window_types]
+    if not isinstance(window_types, list) or not all(
+        window_type in WINDOW_TYPES for window_type in window_types
+    ):
+        msg = "Value of 'window_types' must be one or more of {}.".format(WINDOW_TYPES)
+        raise InvalidEntryError(msg)
+    if not window_types:
+        raise InvalidEntryError("Value of 'window_types' must not be empty.")
+    return window_types
+
+
 class Entry(AbstractBaseConfigEntity):
     """
     A configuration constists of a number of entries.
 
     Each entry has a list of window matching rules and window actions.
+    Windows of other types or transient status are rejected before any rule
+    is evaluated.
     """
 
     _keys = {
@@ -25,10 +51,13 @@ class Entry(AbstractBaseConfigEntity):
         "rules": AbstractBaseRule,
     }
 
-    def __init__(self, name):
+    def __init__(self, name, window_types=WINDOW_TYPES):
         self.name = name
         self.actions = []
         self.rules = []
+        self.rate_limit = None
+        self.window_types = frozenset(window_types)
+        self.transient = None  # None matches both transient and other windows
 
     def parse(self, data):
         for key, item_class in self._keys.items():
@@ -44,36 +73,114 @@ class Entry(AbstractBaseConfigEntity):
             if not getattr(self, key):
                 raise InvalidEntryError("Entry has no valid {}.".format(key))
 
+        if "window_types" in data:
+            self.window_types = frozenset(validate_window_types(data["window_types"]))
+        self.transient = data.get("transient")
+
+        if "rate_limit" in data:
+            try:
+                self.rate_limit = RateLimit.create(data["rate_limit"])
+            except InvalidRateLimitError as error:
+                logger.warning("Invalid rate limit: '%s': %s", self.name, error.message)
+
     @classmethod
     def validate(cls, data):
+        if not isinstance(data, dict):
+            raise InvalidEntryError("Entry must be of type dict.")
         for key in cls._keys:
             try:
                 if not isinstance(data[key], list):
                     raise InvalidEntryError("Type of '{}' must be list!".format(key))
             except KeyError:
                 raise InvalidEntryError("Missing key '{}'!".format(key))
+
+        if "window_types" in data:
+            validate_window_types(data["window_types"])
+        transient = data.get("transient")
+        if transient is not None and type(transient) is not bool:
+            raise InvalidEntryError("Type of 'transient' must be bool or null!")
         return data
 
-    def match(self, window):
-        """Match entry against window."""
-        for rule in self.rules:
-            if rule.match(window):
-                logger.debug("'%s' matched.", self.name)
-                return True
-        return False
+    def accepts(self, info):
+        """Check window type and transient status of WindowInfo (prefilter)."""
+        if info["window_type"] not in self.window_types:
+            return False
+        return self.transient is None or self.transient == info.is_transient()
 
-    def run_actions(self, window, screen, dry_run=False):
-        """Run all entry actions on window."""
-        for action in self.actions:
-            logger.debug(
-                "Entry '%s': Action (%d) '%s' %s",
-                self.name,
-                action.idx,
-                action.name,
-                action.arg,
+    def handle(self, window, batch, dry_run=False):
+        """Run actions on a matched window, obeying the rate limit."""
+        logger.debug("'%s' matched.", self.name)
+        if self.rate_limit is None:
+            self.run_actions(window, batch, dry_run)
+        else:
+            self.rate_limit.admit(
+                window,
+                batch,
+                lambda window, batch: self.run_actions(window, batch, dry_run),
             )
-            if not dry_run:
-                action.run(window, screen)
+
+    def clear_rate_limit(self):
+        """Drop windows waiting for the rate limit, once the entry is gone."""
+        if self.rate_limit is not None:
+            self.rate_limit.clear()
+
+    def run_actions(self, window, batch, dry_run=False):
+        """
+        Run all entry actions on window, in configured order.
+
+        Consecutive state actions are combined, sending only the requests
+        needed to change the current window state. They are carried out
+        before the next other action, so e.g. unmaximizing still happens
+        before resizing. Actions following an Xlib action wait until its
+        request is done. Every action is recorded in the event log.
+        """
+        if dry_run:
+            for action in self.actions:
+                batch.event_log.record(window.get_xid(), self.name, action.name, 0.0)
+            return
+        self._run_actions(window, batch, self.actions)
+
+    def _run_actions(self, window, batch, actions):
+        xid = window.get_xid()
+        event_log = batch.event_log
+        desired_state = {}
+        state_actions = []
+        for i, action in enumerate(actions):
+            if isinstance(action, AbstractBaseStateAction):
+                action.plan(desired_state)
+                state_actions.append(action.name)
+                continue
+            self._apply_state(window, batch, desired_state, state_actions)
+            desired_state, state_actions = {}, []
+            start = time.perf_counter()
+            if isinstance(action, AbstractBaseX11Action):
+
+                def on_done(action=action, start=start, remaining=actions[i + 1 :]):
+                    event_log.record(
+                        xid, self.name, action.name, time.perf_counter() - start
+                    )
+                    self._run_actions(window, batch, remaining)
+
+                batch.submit_x11(window, action.run_x11, on_done)
+                return
+            action.run(window, batch)
+            event_log.record(xid, self.name, action.name, time.perf_counter() - start)
+        self._apply_state(window, batch, desired_state, state_actions)
+
+    def _apply_state(self, window, batch, desired_state, state_actions):
+        """Carry out combined state actions."""
+        if not desired_state:
+            return
+        start = time.perf_counter()
+        sent = apply_state(window, batch, desired_state)
+        batch.event_log.record(
+            window.get_xid(),
+            self.name,
+            "+".join(state_actions),
+            time.perf_counter() - start,
+        )
+        batch.stats.incr("state_requests_sent", sent)
+        batch.stats.incr("state_requests_avoided", len(state_actions) - sent)
 
     def __str__(self):
         ret = "    Entry:\n"
@@ -83,4 +190,9 @@ class Entry(AbstractBaseConfigEntity):
         ret += "      Rules:\n"
         for rule in self.rules:
             ret += "      {}\n".format(rule)
+        ret += "      Window types: {}\n".format(", ".join(sorted(self.window_types)))
+        if self.transient is not None:
+            ret += "      Transient: {}\n".format(self.transient)
+        if self.rate_limit:
+            ret += "      {}\n".format(self.rate_limit)
         return ret
@@ -28,3 +28,11 @@ class InvalidRuleError(ConfigValidationError):
     def __init__(self, cls, message, *args, **kwargs):
         """Initialize error with message."""
         super().__init__("{}: {}".format(cls.__name__, message), *args, **kwargs)
+
+
+class InvalidRateLimitError(ConfigValidationError):
+    """Invalid rate limit encountered."""
+
+    def __init__(self, cls, message, *args, **kwargs):
+        """Initialize error with message."""
+        super().__init__("{}: {}".format(cls.__name__, message), *args, **kwargs)
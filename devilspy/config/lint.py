@@ -0,0 +1,211 @@
+"""Performance linter for parsed configurations."""
+
+from collections import namedtuple
+from functools import lru_cache
+import re
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Relative per-window cost of a single rule value (1 = one string comparison).
+# Exact, prefix, suffix and glob rules are indexed and share one pass per field.
+RULE_COSTS = {"exact": 1, "prefix": 1, "suffix": 1, "glob": 2, "substring": 2, "regex": 10}
+BACKTRACKING_COST = 100
+# Relative cost of fetching a window field, each is fetched once per window
+FIELD_COSTS = {"transient_for": 3, "geometry": 2, "workspace": 2}
+
+# Cheaper rule equivalent to a literal regex, by (anchored at start, anchored at end)
+LITERAL_EQUIVALENTS = {
+    (False, False): "substring",
+    (True, False): "prefix",
+    (False, True): "suffix",
+    (True, True): "exact",
+}
+
+Finding = namedtuple("Finding", ("entry", "message", "suggestion"))
+RegexInfo = namedtuple(
+    "RegexInfo",
+    ("error", "literal", "anchored_start", "anchored_end", "backtracking", "satisfiable"),
+)
+
+_REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+_LITERAL_FLAGS = re.IGNORECASE | re.MULTILINE | re.VERBOSE
+
+
+def _subpatterns(opcode, arg):
+    """Yield nested subpatterns of a parsed regex item."""
+    if opcode in _REPEATS:
+        yield arg[2]
+    elif opcode == sre_parse.SUBPATTERN:
+        yield arg[-1]
+    elif opcode == sre_parse.BRANCH:
+        yield from arg[1]
+    elif opcode in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+        yield arg[1]
+
+
+def _has_backtracking(items, in_repeat=False):
+    """Look for nested unbounded quantifiers like (a+)+."""
+    for opcode, arg in items:
+        is_repeat = opcode in _REPEATS and arg[1] > 1
+        if is_repeat and in_repeat:
+            return True
+        for sub in _subpatterns(opcode, arg):
+            if _has_backtracking(sub, in_repeat or is_repeat):
+                return True
+    return False
+
+
+def _is_satisfiable(items, flags):
+    """Detect top-level anchors that can never match, like 'a$b' or 'a^b'."""
+    if flags & re.MULTILINE:
+        return True
+    seen_end = False
+    newline_ok = True  # '$' also matches before a trailing newline, once
+    for idx, (opcode, arg) in enumerate(items):
+        if opcode == sre_parse.AT and arg == sre_parse.AT_END:
+            seen_end = True
+        elif opcode == sre_parse.AT and arg == sre_parse.AT_END_STRING:
+            seen_end = True
+            newline_ok = False
+        elif opcode == sre_parse.AT and arg == sre_parse.AT_BEGINNING and idx > 0:
+            if any(op == sre_parse.LITERAL for op, _ in items[:idx]):
+                return False
+        elif seen_end and opcode == sre_parse.LITERAL:
+            if not newline_ok or arg != ord("\n"):
+                return False
+            newline_ok = False
+    return True
+
+
+@lru_cache(maxsize=4096)
+def analyze_regex(pattern):
+    """Analyze regular expression for performance issues."""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error as error:
+        return RegexInfo(str(error), None, False, False, False, False)
+
+    items = list(parsed)
+    flags = parsed.state.flags
+    anchored_start = bool(items) and items[0] == (sre_parse.AT, sre_parse.AT_BEGINNING)
+    anchored_end = bool(items) and items[-1] == (sre_parse.AT, sre_parse.AT_END)
+    body = items[int(anchored_start) : len(items) - int(anchored_end)]
+
+    literal = None
+    if not flags & _LITERAL_FLAGS and all(op == sre_parse.LITERAL for op, _ in body):
+        literal = "".join(chr(char) for _, char in body)
+
+    return RegexInfo(
+        None,
+        literal,
+        anchored_start,
+        anchored_end,
+        _has_backtracking(items),
+        _is_satisfiable(items, flags),
+    )
+
+
+def estimate_rule_cost(rule):
+    """Estimate relative per-window cost of a rule."""
+    cost = FIELD_COSTS.get(rule.field, 1)
+    for value in rule.val:
+        if rule.name == "regex" and analyze_regex(value).backtracking:
+            cost += BACKTRACKING_COST
+        else:
+            cost += RULE_COSTS.get(rule.name, RULE_COSTS["regex"])
+    return cost
+
+
+def _lint_regex(entry, value):
+    info = analyze_regex(value)
+    if info.error:
+        yield Finding(entry.name, "Invalid regex '{}': {}.".format(value, info.error), None)
+        return
+    if not info.satisfiable:
+        yield Finding(entry.name, "Regex '{}' can never match.".format(value), None)
+    if info.backtracking:
+        yield Finding(
+            entry.name,
+            "Regex '{}' is prone to catastrophic backtracking.".format(value),
+            "Remove nested quantifiers.",
+        )
+    if info.literal is not None:
+        equivalent = LITERAL_EQUIVALENTS.get((info.anchored_start, info.anchored_end))
+        if equivalent:
+            suggestion = "Use 'match: {}' with val '{}'.".format(
+                equivalent, info.literal
+            )
+            if info.anchored_end:
+                suggestion += " Unlike '$', it does not allow a trailing newline."
+            yield Finding(entry.name, "Regex '{}' is a literal.".format(value), suggestion)
+
+
+def _rule_can_match(rule):
+    if not rule.val:
+        return False
+    if rule.name == "regex":
+        return any(
+            info.error is None and info.satisfiable
+            for info in (analyze_regex(value) for value in rule.val)
+        )
+    return True
+
+
+def _rule_signature(rule):
+    return (rule.name, rule.field, frozenset(rule.val))
+
+
+def lint_config(config):
+    """
+    Analyze configuration for performance issues.
+
+    Returns a list of findings and a dict mapping entry names to their
+    estimated per-window cost.
+    """
+    findings = []
+    costs = {}
+    value_owners = {}  # (match, field, value) -> first entry using it
+    entry_signatures = {}  # rule signatures -> first entry using them
+
+    for entry in config.entries:
+        costs[entry.name] = sum(estimate_rule_cost(rule) for rule in entry.rules)
+
+        for rule in entry.rules:
+            if rule.name == "regex":
+                for value in rule.val:
+                    findings.extend(_lint_regex(entry, value))
+            if not rule.val:
+                findings.append(Finding(entry.name, "Rule has no values.", None))
+
+            for value in rule.val:
+                key = (rule.name, rule.field, value)
+                owner = value_owners.setdefault(key, entry.name)
+                if owner != entry.name:
+                    findings.append(
+                        Finding(
+                            entry.name,
+                            "{} value '{}' on field '{}' also used by entry '{}'.".format(
+                                rule.name, value, rule.field, owner
+                            ),
+                            "Merge the entries or move the value to one of them.",
+                        )
+                    )
+
+        if not any(_rule_can_match(rule) for rule in entry.rules):
+            findings.append(Finding(entry.name, "Entry can never fire.", None))
+
+        signature = frozenset(_rule_signature(rule) for rule in entry.rules)
+        owner = entry_signatures.setdefault(signature, entry.name)
+        if owner != entry.name:
+            findings.append(
+                Finding(
+                    entry.name,
+                    "Entry has the same rules as entry '{}'.".format(owner),
+                    "Merge the actions into entry '{}'.".format(owner),
+                )
+            )
+
+    return findings, costs
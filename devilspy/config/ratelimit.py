@@ -0,0 +1,133 @@
+"""Per-entry rate limit protecting the window manager from runaway apps."""
+
+from collections import OrderedDict
+
+from gi.repository import GLib
+
+from devilspy.config.abc import AbstractBaseConfigEntity
+from devilspy.config.errors import InvalidRateLimitError
+from devilspy.logger import main_logger
+from devilspy.ratelimit import TokenBucket
+
+logger = main_logger.getChild("config.ratelimit")
+
+# Buckets of least recently seen applications are evicted beyond this
+MAX_BUCKETS = 256
+# Windows beyond this queue length are skipped
+MAX_QUEUED = 64
+
+
+def get_application_key(window):
+    """Identify the application a window belongs to."""
+    application = window.get_application()
+    if application:
+        return application.get_xid()
+    return window.get_class_group_name()
+
+
+class RateLimit(AbstractBaseConfigEntity):
+    """
+    Token bucket rate limit of an entry, kept separately for each application.
+
+    Windows exceeding the limit are still matched, but their actions are
+    either skipped or queued until a token becomes available.
+    """
+
+    modes = ("skip", "queue")
+
+    def __init__(self):
+        self.rate = None
+        self.burst = None
+        self.mode = None
+        self._buckets = OrderedDict()
+
+    def parse(self, data):
+        self.rate = data["rate"]
+        self.burst = data.get("burst", max(1, int(self.rate)))
+        self.mode = data.get("mode", "skip")
+
+    @classmethod
+    def validate(cls, data):
+        # Transform rate limit short notation into canonical form
+        if type(data) in (int, float):
+            data = {"rate": data}
+        if not isinstance(data, dict):
+            raise InvalidRateLimitError(cls, "Rate limit must be number or dict.")
+
+        if type(data.get("rate")) not in (int, float) or data["rate"] <= 0:
+            raise InvalidRateLimitError(cls, "Field 'rate' must be a positive number.")
+        if "burst" in data and (type(data["burst"]) is not int or data["burst"] < 1):
+            raise InvalidRateLimitError(cls, "Field 'burst' must be a positive integer.")
+        if data.get("mode", "skip") not in cls.modes:
+            msg = "Value of 'mode' must be one of {}.".format(cls.modes)
+            raise InvalidRateLimitError(cls, msg)
+        return data
+
+    def admit(self, window, batch, run):
+        """Call run(window, batch) now, later or never, depending on the limit."""
+        bucket = self._get_bucket(get_application_key(window), batch.stats)
+
+        if not bucket.queue and bucket.consume():
+            run(window, batch)
+            return
+
+        if self.mode == "skip" or len(bucket.queue) >= MAX_QUEUED:
+            batch.stats.incr("rate_limit_skipped")
+            return
+
+        # Queued windows are identified by their record, which is discarded on close
+        record = batch.window_table.get(window.get_xid())
+        bucket.queue.append((window, batch, record, run))
+        batch.stats.incr("rate_limit_queued")
+        if bucket.source is None:
+            self._schedule(bucket)
+
+    def _schedule(self, bucket):
+        delay = max(1, round(bucket.delay() * 1000))
+        bucket.source = GLib.timeout_add(delay, self._drain, bucket)
+
+    def _drain(self, bucket):
+        """Run queued windows as tokens become available."""
+        bucket.source = None
+        while bucket.queue and bucket.consume():
+            window, batch, record, run = bucket.queue.popleft()
+            if batch.window_table.peek(record.xid) is record:
+                run(window, batch)
+            else:
+                batch.stats.incr("rate_limit_dropped")
+        if bucket.queue:
+            self._schedule(bucket)
+        return False  # Notify GLib to remove this timeout
+
+    def _get_bucket(self, key, stats):
+        try:
+            self._buckets.move_to_end(key)
+            return self._buckets[key]
+        except KeyError:
+            if len(self._buckets) >= MAX_BUCKETS:
+                _, oldest = self._buckets.popitem(last=False)
+                self._evict(oldest)
+                stats.incr("rate_limit_evicted")
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def clear(self):
+        """Forget all buckets, dropping the windows still waiting in them."""
+        while self._buckets:
+            _, bucket = self._buckets.popitem()
+            self._evict(bucket)
+
+    @staticmethod
+    def _evict(bucket):
+        """Forget bucket, dropping the windows still waiting in it."""
+        if bucket.source is not None:
+            GLib.source_remove(bucket.source)
+            bucket.source = None
+        while bucket.queue:
+            _, batch, _, _ = bucket.queue.popleft()
+            batch.stats.incr("rate_limit_dropped")
+
+    def __str__(self):
+        return "  RateLimit: rate={} burst={} mode={}".format(
+            self.rate, self.burst, self.mode
+        )
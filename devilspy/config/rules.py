@@ -1,10 +1,44 @@
 """Window matcher rules."""
 
 from abc import ABCMeta, abstractmethod
+import fnmatch
+from functools import lru_cache
 import re
+import time
+
+try:
+    import re2
+except ImportError:
+    re2 = None
 
 from devilspy.config.abc import AbstractBaseConfigEnumerableEntity
 from devilspy.config.errors import InvalidRuleError
+from devilspy.config.lint import analyze_regex
+from devilspy.logger import main_logger
+from devilspy.windowinfo import FIELD_NAMES
+
+logger = main_logger.getChild("config.rules")
+
+# Window values are cut to this length before regex matching
+MAX_FIELD_LENGTH = 1024
+# Regex rules taking longer than this (in milliseconds) are disabled
+REGEX_BUDGET_MS = 50
+
+
+@lru_cache(maxsize=1)
+def _warn_re_fallback():
+    logger.warning("google-re2 not installed, regex rules use 're'.")
+
+
+def _uses_re(engine, regex):
+    """Check if regex is matched by 're' with given engine setting."""
+    if engine == "re" or re2 is None:
+        return True
+    try:
+        re2.compile(regex)
+    except re2.error:
+        return True
+    return False
 
 
 class AbstractBaseRule(AbstractBaseConfigEnumerableEntity, metaclass=ABCMeta):
@@ -25,8 +59,8 @@ class AbstractBaseRule(AbstractBaseConfigEnumerableEntity, metaclass=ABCMeta):
         return data
 
     @abstractmethod
-    def match(self, window):
-        """Match rule against Wnck.Window."""
+    def match(self, info):
+        """Match rule against WindowInfo."""
 
 
 class AbstractBaseStringMatcherRule(AbstractBaseRule, metaclass=ABCMeta):
@@ -83,21 +117,15 @@ class AbstractBaseStringMatcherRule(AbstractBaseRule, metaclass=ABCMeta):
         """Get string matcher class for config name."""
         try:
             return STRING_RULE_MAPPING[name]
-        except KeyError:
+        except (KeyError, TypeError):  # TypeError for unhashable names
             vals = list(STRING_RULE_MAPPING.keys())
             raise InvalidRuleError(
                 cls, "Invalid value for 'match'. Must be one of {}.".format(vals)
             )
 
-    def get_window_data(self, window):
+    def get_window_data(self, info):
         """Extract piece of information from window."""
-        if self.field == "class_group":
-            return window.get_class_group_name()
-        if self.field == "name":
-            return window.get_name()
-        if self.field == "role":
-            return window.get_role()
-        return window.get_application().get_name()  # field == "app_name"
+        return info[self.field]
 
     def __str__(self):
         return "  {}: field={} val={}".format(type(self).__name__, self.field, self.val)
@@ -108,8 +136,8 @@ class ExactStringRule(AbstractBaseStringMatcherRule):
 
     name = "exact"
 
-    def match(self, window):
-        win_value = self.get_window_data(window)
+    def match(self, info):
+        win_value = self.get_window_data(info)
         for value in self.val:
             if value == win_value:
                 return True
@@ -117,16 +145,94 @@ class ExactStringRule(AbstractBaseStringMatcherRule):
 
 
 class RegexRule(AbstractBaseStringMatcherRule):
-    """Match regular expression against string."""
+    """
+    Match regular expression against string.
+
+    Window values are cut to max_length characters before matching. With
+    engine 're2' (or 'auto' if installed) patterns are matched in linear time.
+    're' cannot be interrupted, so patterns prone to catastrophic backtracking
+    are rejected when matched by 're'. A rule whose match still takes longer
+    than its time budget is disabled.
+    """
 
     name = "regex"
+    engines = ("auto", "re", "re2")
 
-    def match(self, window):
-        win_value = self.get_window_data(window)
-        for regex in self.val:
-            if re.search(regex, win_value):
-                return True
-        return False
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.engine = None
+        self.max_length = None
+        self.budget = None
+        self.disabled = False
+        self._regexes = []
+
+    def parse(self, data):
+        super().parse(data)
+        self.engine = data.get("engine", "auto")
+        self.max_length = data.get("max_length", MAX_FIELD_LENGTH)
+        self.budget = data.get("budget", REGEX_BUDGET_MS) / 1000
+        if self.engine == "re2" and re2 is None:
+            logger.warning("Regex engine 're2' not installed, using 're'.")
+            self.engine = "re"
+        elif self.engine == "auto" and re2 is None:
+            _warn_re_fallback()
+        self._regexes = [self._compile(regex) for regex in self.val]
+
+    def _compile(self, regex):
+        if self.engine != "re" and re2 is not None:
+            try:
+                return re2.compile(regex)
+            except re2.error:
+                if self.engine == "re2":
+                    logger.warning("Regex '%s' not supported by re2, using re.", regex)
+        return re.compile(regex)
+
+    @classmethod
+    def validate(cls, data):
+        data = super().validate(data)
+        if data.get("engine", "auto") not in cls.engines:
+            msg = "Value of 'engine' must be one of {}.".format(cls.engines)
+            raise InvalidRuleError(cls, msg)
+        for key in ("max_length", "budget"):
+            if key in data and (type(data[key]) is not int or data[key] < 1):
+                msg = "Field '{}' must be a positive integer.".format(key)
+                raise InvalidRuleError(cls, msg)
+        vals = [data["val"]] if isinstance(data["val"], str) else data["val"]
+        for regex in vals:
+            try:
+                re.compile(regex)
+            except re.error as error:
+                msg = "Invalid regex '{}': {}.".format(regex, error)
+                raise InvalidRuleError(cls, msg)
+            engine = data.get("engine", "auto")
+            if analyze_regex(regex).backtracking and _uses_re(engine, regex):
+                msg = (
+                    "Regex '{}' is prone to catastrophic backtracking with engine 're'. "
+                    "Remove nested quantifiers or install google-re2.".format(regex)
+                )
+                raise InvalidRuleError(cls, msg)
+        return data
+
+    def match(self, info):
+        if self.disabled:
+            return False
+        win_value = self.get_window_data(info)[: self.max_length]
+        start = time.perf_counter()
+        try:
+            for regex in self._regexes:
+                if regex.search(win_value):
+                    return True
+            return False
+        finally:
+            duration = time.perf_counter() - start
+            if duration > self.budget:
+                self.disabled = True
+                logger.warning(
+                    "Disabled regex rule on field '%s' %s: match took %.0f ms.",
+                    self.field,
+                    self.val,
+                    duration * 1000,
+                )
 
 
 class SubstringRule(AbstractBaseStringMatcherRule):
@@ -134,14 +240,59 @@ class SubstringRule(AbstractBaseStringMatcherRule):
 
     name = "substring"
 
-    def match(self, window):
-        win_value = self.get_window_data(window)
+    def match(self, info):
+        win_value = self.get_window_data(info)
         for string in self.val:
             if string in win_value:
                 return True
         return False
 
 
-FIELD_NAMES = ("class_group", "name", "role", "app_name")
-STRING_RULE_CLASSES = (ExactStringRule, RegexRule, SubstringRule)
+class PrefixRule(AbstractBaseStringMatcherRule):
+    """Match string prefix."""
+
+    name = "prefix"
+
+    def match(self, info):
+        return self.get_window_data(info).startswith(tuple(self.val))
+
+
+class SuffixRule(AbstractBaseStringMatcherRule):
+    """Match string suffix."""
+
+    name = "suffix"
+
+    def match(self, info):
+        return self.get_window_data(info).endswith(tuple(self.val))
+
+
+class GlobRule(AbstractBaseStringMatcherRule):
+    """Match shell-style wildcard pattern (*, ?, [seq]) against string."""
+
+    name = "glob"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.regexes = []
+
+    def parse(self, data):
+        super().parse(data)
+        self.regexes = [re.compile(fnmatch.translate(glob)) for glob in self.val]
+
+    def match(self, info):
+        win_value = self.get_window_data(info)
+        for regex in self.regexes:
+            if regex.match(win_value):
+                return True
+        return False
+
+
+STRING_RULE_CLASSES = (
+    ExactStringRule,
+    GlobRule,
+    PrefixRule,
+    RegexRule,
+    SubstringRule,
+    SuffixRule,
+)
 STRING_RULE_MAPPING = {cls.name: cls for cls in STRING_RULE_CLASSES}
@@ -0,0 +1,214 @@
+"""Local control API to inspect and change entries of a running devilspy."""
+
+import json
+import os
+import os.path
+import socket
+
+from gi.repository import Gio, GLib
+
+from devilspy.logger import main_logger
+from devilspy.meta import PROGRAM_NAME
+from devilspy.windowinfo import WindowInfo
+
+logger = main_logger.getChild("control")
+
+
+def get_default_socket_path():
+    """Get control socket path in the user runtime directory."""
+    return os.path.join(GLib.get_user_runtime_dir(), PROGRAM_NAME, "control.sock")
+
+
+class ControlError(Exception):
+    """Invalid control request."""
+
+
+class ControlServer:
+    """
+    Serve JSON line requests on a Unix socket.
+
+    Each request is a JSON object with a 'command' key:
+
+        {"command": "list"}
+        {"command": "add", "name": "...", "entry": {"rules": [...], "actions": [...]}}
+        {"command": "replace", "name": "...", "entry": {...}}
+        {"command": "remove", "name": "..."}
+        {"command": "match", "attributes": {"class_group": "...", "name": "..."}}
+
+    Each response is a JSON object with 'ok' and either a result or 'error'.
+    """
+
+    def __init__(self, config, path):
+        self._config = config
+        self._path = path
+        self._connections = set()
+        self._commands = {
+            "list": self._cmd_list,
+            "add": self._cmd_add,
+            "replace": self._cmd_replace,
+            "remove": self._cmd_remove,
+            "match": self._cmd_match,
+        }
+
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        if os.path.exists(path):
+            if is_serving(path):
+                raise ControlError(
+                    "Another devilspy is serving on control socket {}.".format(path)
+                )
+            os.unlink(path)  # Stale socket of a previous instance
+        self._service = Gio.SocketService.new()
+        self._service.add_address(
+            Gio.UnixSocketAddress.new(path),
+            Gio.SocketType.STREAM,
+            Gio.SocketProtocol.DEFAULT,
+            None,
+        )
+        self._service.connect("incoming", self.on_incoming)
+        self._service.start()
+        logger.info("Control socket listening on %s", path)
+
+    def stop(self):
+        """Stop serving and remove socket."""
+        self._service.stop()
+        self._service.close()
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+
+    def on_incoming(self, service, connection, source_object):
+        """Callback for new client connections."""
+        self._connections.add(connection)
+        stream = Gio.DataInputStream.new(connection.get_input_stream())
+        self._read_request(connection, stream)
+        return True  # Connection is handled
+
+    def _read_request(self, connection, stream):
+        stream.read_line_async(
+            GLib.PRIORITY_DEFAULT, None, self._on_request, connection
+        )
+
+    def _close(self, connection):
+        connection.close(None)
+        self._connections.discard(connection)
+
+    def _on_request(self, stream, result, connection):
+        try:
+            line, _ = stream.read_line_finish_utf8(result)
+        except GLib.Error as error:  # Invalid UTF-8 or broken connection
+            logger.warning("Closing control connection: %s", error.message)
+            self._close(connection)
+            return
+        if line is None:  # Client closed connection
+            self._close(connection)
+            return
+        if not line.strip():
+            self._read_request(connection, stream)
+            return
+        response = json.dumps(self.handle_request(line)).encode() + b"\n"
+        connection.get_output_stream().write_all_async(
+            response,
+            GLib.PRIORITY_DEFAULT,
+            None,
+            self._on_response,
+            (connection, stream),
+        )
+
+    def _on_response(self, output, result, data):
+        connection, stream = data
+        try:
+            output.write_all_finish(result)
+        except GLib.Error as error:  # Client went away
+            logger.warning("Closing control connection: %s", error.message)
+            self._close(connection)
+            return
+        self._read_request(connection, stream)
+
+    def handle_request(self, line):
+        """Handle one JSON request, return response."""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ControlError("Request must be a JSON object.")
+            try:
+                command = self._commands[request.get("command")]
+            except KeyError:
+                vals = list(self._commands.keys())
+                raise ControlError("Value of 'command' must be one of {}.".format(vals))
+            result = command(request)
+        except ValueError as error:  # Includes ConfigValidationError
+            message = getattr(error, "message", str(error))
+            return {"ok": False, "error": message}
+        except ControlError as error:
+            return {"ok": False, "error": str(error)}
+        except Exception as error:  # pylint: disable=broad-except
+            # Malformed entries must not cost the client its connection
+            logger.exception("Control request failed.")
+            return {"ok": False, "error": "Internal error: {}".format(error)}
+        result["ok"] = True
+        return result
+
+    @staticmethod
+    def _get_arg(request, key, type_):
+        try:
+            value = request[key]
+        except KeyError:
+            raise ControlError("Missing key '{}'.".format(key))
+        if not isinstance(value, type_):
+            msg = "Type of '{}' must be {}.".format(key, type_.__name__)
+            raise ControlError(msg)
+        return value
+
+    def _cmd_list(self, _):
+        return {"entries": [entry.name for entry in self._config.entries]}
+
+    def _cmd_add(self, request):
+        name = self._get_arg(request, "name", str)
+        self._config.add_entry(name, self._get_arg(request, "entry", dict))
+        logger.info("Entry '%s' added.", name)
+        return {}
+
+    def _cmd_replace(self, request):
+        name = self._get_arg(request, "name", str)
+        self._config.replace_entry(name, self._get_arg(request, "entry", dict))
+        logger.info("Entry '%s' replaced.", name)
+        return {}
+
+    def _cmd_remove(self, request):
+        name = self._get_arg(request, "name", str)
+        self._config.remove_entry(name)
+        logger.info("Entry '%s' removed.", name)
+        return {}
+
+    def _cmd_match(self, request):
+        attributes = self._get_arg(request, "attributes", dict)
+        info = WindowInfo.from_values(
+            {field: str(value) for field, value in attributes.items()}
+        )
+        entries = []
+        if self._config.engine.prefilter(info):
+            entries = [entry.name for entry in self._config.engine.match(info)]
+        return {"entries": entries}
+
+
+def is_serving(path):
+    """Check if a process accepts connections on the control socket."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def send_request(path, request):
+    """Send request to control socket of a running devilspy, return response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        response = b""
+        while not response.endswith(b"\n"):
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            response += chunk
+    return json.loads(response.decode())
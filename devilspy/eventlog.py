@@ -0,0 +1,126 @@
+"""Structured event log of carried out actions."""
+
+from collections import deque, namedtuple
+import json
+import struct
+import time
+
+Record = namedtuple("Record", ("timestamp", "xid", "entry", "action", "duration"))
+
+# Number of records kept in memory
+RING_SIZE = 4096
+
+# Seconds between flushes of the event log stream
+FLUSH_INTERVAL = 5
+
+BINARY_MAGIC = b"DSPYLOG1"
+# timestamp, xid, duration, length of entry name, length of action name
+BINARY_HEADER = struct.Struct("<dIdHH")
+
+
+class JsonlWriter:
+    """Write records as JSON lines."""
+
+    def __init__(self, fileobj):
+        self._file = fileobj
+
+    def write(self, record):
+        """Write single record."""
+        self._file.write(json.dumps(record._asdict()).encode() + b"\n")
+
+    def flush(self):
+        """Flush underlying file."""
+        self._file.flush()
+
+
+class BinaryWriter:
+    """Write records in compact binary form."""
+
+    def __init__(self, fileobj):
+        self._file = fileobj
+        try:
+            is_new = fileobj.tell() == 0
+        except OSError:  # Pipes and terminals always start a new stream
+            is_new = True
+        if is_new:
+            fileobj.write(BINARY_MAGIC)
+
+    def write(self, record):
+        """Write single record."""
+        entry = record.entry.encode()
+        action = record.action.encode()
+        self._file.write(
+            BINARY_HEADER.pack(
+                record.timestamp, record.xid, record.duration, len(entry), len(action)
+            )
+            + entry
+            + action
+        )
+
+    def flush(self):
+        """Flush underlying file."""
+        self._file.flush()
+
+
+WRITERS = {"binary": BinaryWriter, "jsonl": JsonlWriter}
+
+
+def read_records(fileobj):
+    """Read records from binary or JSON lines file."""
+    magic = fileobj.read(len(BINARY_MAGIC))
+    if magic == BINARY_MAGIC:
+        while True:
+            header = fileobj.read(BINARY_HEADER.size)
+            if len(header) < BINARY_HEADER.size:
+                return
+            timestamp, xid, duration, entry_len, action_len = BINARY_HEADER.unpack(header)
+            entry = fileobj.read(entry_len).decode()
+            action = fileobj.read(action_len).decode()
+            yield Record(timestamp, xid, entry, action, duration)
+    else:
+        for line in (magic + fileobj.read()).splitlines():
+            if line.strip():
+                yield Record(**json.loads(line))
+
+
+def format_record(record):
+    """Format record in human-readable form."""
+    return "{} 0x{:08x} {} {} {:.3f} ms".format(
+        time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.timestamp)),
+        record.xid,
+        record.entry,
+        record.action,
+        record.duration * 1000,
+    )
+
+
+class EventLog:
+    """
+    Append fixed-shape records to an in-memory ring buffer.
+
+    Records can additionally be streamed to a file. Nothing is formatted for
+    humans until the log is read.
+    """
+
+    def __init__(self, size=RING_SIZE, writer=None):
+        self._records = deque(maxlen=size)
+        self._writer = writer
+
+    def record(self, xid, entry, action, duration):
+        """Add record."""
+        # Entry names are YAML keys and may be numbers
+        record = Record(time.time(), xid, str(entry), action, duration)
+        self._records.append(record)
+        if self._writer is not None:
+            self._writer.write(record)
+
+    def flush(self):
+        """Flush stream."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def __iter__(self):
+        return iter(list(self._records))
+
+    def __len__(self):
+        return len(self._records)
@@ -0,0 +1,157 @@
+"""Cached monitor layout and work areas of a screen."""
+
+from collections import namedtuple
+import select
+import threading
+
+from gi.repository import Gdk, GLib, Wnck
+from Xlib import X
+from Xlib.display import Display as XDisplay
+from Xlib.error import DisplayError
+
+from devilspy.logger import main_logger
+
+logger = main_logger.getChild("geometry")
+
+Rect = namedtuple("Rect", ("x", "y", "width", "height"))
+Monitor = namedtuple("Monitor", ("number", "geometry", "workarea", "primary"))
+
+# Root window properties work areas are derived from
+WORKAREA_ATOMS = ("_NET_WORKAREA", "_NET_CURRENT_DESKTOP")
+
+# Seconds between checks whether the watcher should stop
+WATCHER_POLL_INTERVAL = 1.0
+
+
+def _scale_rect(rect, scale):
+    return Rect(rect.x * scale, rect.y * scale, rect.width * scale, rect.height * scale)
+
+
+class GeometryCache:
+    """
+    Monitor geometries and work areas of one screen.
+
+    Monitors are queried once and kept until the layout or a work area
+    changes, instead of once per window. Only the default screen is known to
+    Gdk, other screens are treated as a single monitor without panels.
+    """
+
+    def __init__(self, screen):
+        self._screen = screen
+        self._monitors = None
+        self._is_default = screen == Wnck.Screen.get_default()
+        if self._is_default:
+            gdk_screen = Gdk.Screen.get_default()
+            gdk_screen.connect("monitors-changed", self.on_changed)
+            gdk_screen.connect("size-changed", self.on_changed)
+
+    def on_changed(self, *_):
+        """Callback for changed monitor layout."""
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop cached monitors."""
+        if self._monitors is not None:
+            logger.debug("Screen %d geometry changed.", self._screen.get_number())
+        self._monitors = None
+
+    @property
+    def monitors(self):
+        """Monitors of screen, in device pixels."""
+        if self._monitors is None:
+            self._monitors = self._load_monitors()
+        return self._monitors
+
+    def _load_monitors(self):
+        if not self._is_default:
+            rect = Rect(0, 0, self._screen.get_width(), self._screen.get_height())
+            return [Monitor(0, rect, rect, True)]
+
+        display = Gdk.Display.get_default()
+        monitors = []
+        for number in range(display.get_n_monitors()):
+            monitor = display.get_monitor(number)
+            scale = monitor.get_scale_factor()
+            monitors.append(
+                Monitor(
+                    number,
+                    _scale_rect(monitor.get_geometry(), scale),
+                    _scale_rect(monitor.get_workarea(), scale),
+                    monitor.is_primary(),
+                )
+            )
+        return monitors
+
+    def get_monitor(self, number):
+        """Get monitor by number (None if it does not exist)."""
+        monitors = self.monitors
+        if 0 <= number < len(monitors):
+            return monitors[number]
+        return None
+
+    def get_window_monitor(self, window):
+        """Get monitor the center of a window is on, or the primary monitor."""
+        xpos, ypos, width, height = window.get_geometry()
+        center_x, center_y = xpos + width // 2, ypos + height // 2
+        fallback = None
+        for monitor in self.monitors:
+            geom = monitor.geometry
+            if (
+                geom.x <= center_x < geom.x + geom.width
+                and geom.y <= center_y < geom.y + geom.height
+            ):
+                return monitor
+            if monitor.primary or fallback is None:
+                fallback = monitor
+        return fallback
+
+
+class WorkareaWatcher(threading.Thread):
+    """
+    Watch root windows for work area changes on a dedicated thread.
+
+    Gdk re-reads work areas on every query but does not notify about
+    changes, so root window properties are watched with a separate X
+    connection and on_change(screen_number) is called on the main loop.
+    """
+
+    def __init__(self, screen_numbers, on_change):
+        super().__init__(name="devilspy-workarea", daemon=True)
+        self._screen_numbers = screen_numbers
+        self._on_change = on_change
+        self._stopped = threading.Event()
+
+    def stop(self):
+        """Stop watching."""
+        self._stopped.set()
+
+    def run(self):
+        try:
+            xdisplay = XDisplay()
+        except DisplayError as error:
+            logger.error("Work area watcher could not connect to X server: %s", error)
+            return
+
+        atoms = {xdisplay.intern_atom(name) for name in WORKAREA_ATOMS}
+        roots = {}
+        for number in self._screen_numbers:
+            root = xdisplay.screen(number).root
+            root.change_attributes(event_mask=X.PropertyChangeMask)
+            roots[root.id] = number
+
+        while not self._stopped.is_set():
+            if not xdisplay.pending_events():
+                select.select([xdisplay], [], [], WATCHER_POLL_INTERVAL)
+            changed = set()
+            while xdisplay.pending_events():
+                event = xdisplay.next_event()
+                if event.type == X.PropertyNotify and event.atom in atoms:
+                    changed.add(roots.get(event.window.id))
+            for number in changed - {None}:
+                GLib.idle_add(self._report_change, number)
+
+        xdisplay.close()
+
+    def _report_change(self, number):
+        self._on_change(number)
+        return False  # Notify GLib to remove this idle source
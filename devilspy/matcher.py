@@ -0,0 +1,306 @@
+"""Match engine finding all entries matching a window in one pass per field."""
+
+from collections import Counter
+from itertools import count
+
+from devilspy.config.rules import (
+    ExactStringRule,
+    GlobRule,
+    PrefixRule,
+    SuffixRule,
+)
+
+
+class TrieNode:
+    """Trie node holding payloads of keys ending here."""
+
+    __slots__ = ("children", "payloads")
+
+    def __init__(self):
+        self.children = {}
+        self.payloads = []
+
+
+class Trie:
+    """Character trie finding all keys that are a prefix of a value."""
+
+    def __init__(self):
+        self._root = TrieNode()
+
+    def insert(self, key, payload):
+        """Add payload for key."""
+        node = self._root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = TrieNode()
+            node = child
+        node.payloads.append(payload)
+
+    def remove(self, key, payload):
+        """Remove one occurrence of payload for key, pruning empty nodes."""
+        path = [self._root]
+        for char in key:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        try:
+            path[-1].payloads.remove(payload)
+        except ValueError:
+            return
+        for depth in range(len(key), 0, -1):
+            node = path[depth]
+            if node.payloads or node.children:
+                break
+            del path[depth - 1].children[key[depth - 1]]
+
+    def find(self, value):
+        """Yield payloads of all keys that are a prefix of value."""
+        node = self._root
+        yield from node.payloads
+        for char in value:
+            node = node.children.get(char)
+            if node is None:
+                return
+            yield from node.payloads
+
+
+def _find_bracket_end(glob, start):
+    """Get index after the ']' closing the '[' at start (None if unclosed)."""
+    i = start + 1
+    if i < len(glob) and glob[i] == "!":
+        i += 1
+    if i < len(glob) and glob[i] == "]":
+        i += 1  # ']' right after '[' or '[!' is part of the set
+    i = glob.find("]", i)
+    return None if i == -1 else i + 1
+
+
+def split_glob(glob):
+    """
+    Get literal prefix and suffix of a glob pattern.
+
+    Follows fnmatch: an unclosed '[' is a literal character.
+    """
+    start = end = None  # span of the wildcard part
+    i = 0
+    while i < len(glob):
+        if glob[i] in "*?":
+            next_i = i + 1
+        elif glob[i] == "[":
+            next_i = _find_bracket_end(glob, i)
+            if next_i is None:
+                i += 1
+                continue
+        else:
+            i += 1
+            continue
+        if start is None:
+            start = i
+        end = i = next_i
+    if start is None:
+        return glob, glob
+    return glob[:start], glob[end:]
+
+
+class FieldIndex:
+    """Indexes for exact, prefix, suffix and glob rules on one window field."""
+
+    def __init__(self):
+        self.exact = {}
+        self.prefixes = Trie()
+        self.suffixes = Trie()  # keys are reversed
+        self.glob_prefixes = Trie()
+        self.glob_suffixes = Trie()  # keys are reversed
+        self.globs = []  # globs without literal prefix or suffix
+        self.size = 0
+
+    def add(self, rule, entry_id):
+        """Index all values of rule."""
+        if isinstance(rule, ExactStringRule):
+            for value in rule.val:
+                self.exact.setdefault(value, []).append(entry_id)
+        elif isinstance(rule, PrefixRule):
+            for value in rule.val:
+                self.prefixes.insert(value, entry_id)
+        elif isinstance(rule, SuffixRule):
+            for value in rule.val:
+                self.suffixes.insert(value[::-1], entry_id)
+        else:
+            # Split all globs first, so a failure leaves the index unchanged
+            keys = [self._get_glob_index(glob) for glob in rule.val]
+            for (trie, key), regex in zip(keys, rule.regexes):
+                if trie is None:
+                    self.globs.append((entry_id, regex))
+                else:
+                    trie.insert(key, (entry_id, regex))
+        self.size += len(rule.val)
+
+    def remove(self, rule, entry_id):
+        """Remove all values of rule from index."""
+        if isinstance(rule, ExactStringRule):
+            for value in rule.val:
+                ids = self.exact.get(value, [])
+                if entry_id in ids:
+                    ids.remove(entry_id)
+                if not ids:
+                    self.exact.pop(value, None)
+        elif isinstance(rule, PrefixRule):
+            for value in rule.val:
+                self.prefixes.remove(value, entry_id)
+        elif isinstance(rule, SuffixRule):
+            for value in rule.val:
+                self.suffixes.remove(value[::-1], entry_id)
+        else:
+            for glob, regex in zip(rule.val, rule.regexes):
+                trie, key = self._get_glob_index(glob)
+                if trie is None:
+                    self.globs.remove((entry_id, regex))
+                else:
+                    trie.remove(key, (entry_id, regex))
+        self.size -= len(rule.val)
+
+    def _get_glob_index(self, glob):
+        """Get trie and key for the longest literal part of a glob (None if none)."""
+        prefix, suffix = split_glob(glob)
+        if prefix and len(prefix) >= len(suffix):
+            return self.glob_prefixes, prefix
+        if suffix:
+            return self.glob_suffixes, suffix[::-1]
+        return None, None
+
+    def collect(self, value, matched):
+        """Add IDs of all entries with a rule matching value to matched."""
+        matched.update(self.exact.get(value, ()))
+        matched.update(self.prefixes.find(value))
+        reversed_value = value[::-1]
+        matched.update(self.suffixes.find(reversed_value))
+        for candidates in (
+            self.glob_prefixes.find(value),
+            self.glob_suffixes.find(reversed_value),
+            self.globs,
+        ):
+            for entry_id, regex in candidates:
+                if entry_id not in matched and regex.match(value):
+                    matched.add(entry_id)
+
+
+INDEXED_RULES = (ExactStringRule, GlobRule, PrefixRule, SuffixRule)
+
+
+class MatchEngine:
+    """
+    Find all entries matching a window.
+
+    Exact, prefix, suffix and glob rules are indexed per field, so one pass
+    over each window value finds all of them. Other rules are evaluated one
+    by one, skipping entries that already matched. Entries can be added and
+    removed without rebuilding the indexes of other entries.
+    """
+
+    def __init__(self, entries=()):
+        self._ids = count()
+        self._entries = {}  # entry ID -> entry, IDs increase in config order
+        self._entry_ids = {}  # id(entry) -> entry ID
+        self._fields = {}  # field name -> FieldIndex
+        self._scan_rules = {}  # entry ID -> rules evaluated one by one
+        self._field_refs = Counter()  # field name -> number of rules using it
+        self._window_types = Counter()  # window type -> number of entries accepting it
+        self._transient = Counter()  # transient status -> number of entries accepting it
+        for entry in entries:
+            self.add_entry(entry)
+
+    def add_entry(self, entry, entry_id=None):
+        """Add entry to engine, leaving the engine unchanged if that fails."""
+        if entry_id is None:
+            entry_id = next(self._ids)
+        self._entries[entry_id] = entry
+        self._entry_ids[id(entry)] = entry_id
+        self._window_types.update(entry.window_types)
+        self._transient.update(self._get_transient_states(entry))
+        added = []
+        try:
+            for rule in entry.rules:
+                self._add_rule(rule, entry_id)
+                added.append(rule)
+        except Exception:
+            self._remove(entry, entry_id, added)
+            raise
+        return entry_id
+
+    def replace_entry(self, old_entry, entry):
+        """Replace entry, keeping its position in match order."""
+        entry_id = self.remove_entry(old_entry)
+        try:
+            self.add_entry(entry, entry_id)
+        except Exception:
+            self.add_entry(old_entry, entry_id)
+            raise
+
+    def remove_entry(self, entry):
+        """Remove entry from engine, return its ID."""
+        entry_id = self._entry_ids[id(entry)]
+        self._remove(entry, entry_id, entry.rules)
+        return entry_id
+
+    def _remove(self, entry, entry_id, rules):
+        del self._entry_ids[id(entry)]
+        del self._entries[entry_id]
+        self._scan_rules.pop(entry_id, None)
+        self._window_types.subtract(entry.window_types)
+        self._transient.subtract(self._get_transient_states(entry))
+        self._window_types += Counter()  # Drop types no entry accepts
+        self._transient += Counter()
+        for rule in rules:
+            self._field_refs[rule.field] -= 1
+            if not self._field_refs[rule.field]:
+                del self._field_refs[rule.field]
+            if isinstance(rule, INDEXED_RULES):
+                index = self._fields[rule.field]
+                index.remove(rule, entry_id)
+                if not index.size:
+                    del self._fields[rule.field]
+
+    def _add_rule(self, rule, entry_id):
+        if isinstance(rule, INDEXED_RULES):
+            self._fields.setdefault(rule.field, FieldIndex()).add(rule, entry_id)
+        else:
+            self._scan_rules.setdefault(entry_id, []).append(rule)
+        self._field_refs[rule.field] += 1
+
+    @staticmethod
+    def _get_transient_states(entry):
+        if entry.transient is None:
+            return (False, True)
+        return (entry.transient,)
+
+    def prefilter(self, info):
+        """Cheap check if any entry accepts window type and transient status."""
+        return (
+            info["window_type"] in self._window_types
+            and info.is_transient() in self._transient
+        )
+
+    @property
+    def fields(self):
+        """Window fields referenced by any rule."""
+        return set(self._field_refs)
+
+    def match(self, info):
+        """Get all entries matching WindowInfo in config order."""
+        matched = set()
+        for field, index in self._fields.items():
+            index.collect(info[field], matched)
+        for entry_id, rules in self._scan_rules.items():
+            if (
+                entry_id not in matched
+                and self._entries[entry_id].accepts(info)
+                and any(rule.match(info) for rule in rules)
+            ):
+                matched.add(entry_id)
+        return [
+            self._entries[entry_id]
+            for entry_id in sorted(matched)
+            if self._entries[entry_id].accepts(info)
+        ]
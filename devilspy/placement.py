@@ -0,0 +1,244 @@
+"""Place windows next to the ones already on their workspace."""
+
+from collections import defaultdict
+
+from gi.repository import Wnck
+
+from devilspy.geometry import Rect
+
+# Edge length of spatial index buckets in pixels
+CELL_SIZE = 256
+
+# Offset between cascaded windows in pixels
+DEFAULT_CASCADE_STEP = (32, 32)
+
+# Window types that never take up space on a workspace
+IGNORED_WINDOW_TYPES = (Wnck.WindowType.DESKTOP,)
+
+
+def intersects(rect, other):
+    """Check if two rectangles overlap."""
+    return (
+        rect.x < other.x + other.width
+        and other.x < rect.x + rect.width
+        and rect.y < other.y + other.height
+        and other.y < rect.y + rect.height
+    )
+
+
+def overlap_area(rect, other):
+    """Get area of the intersection of two overlapping rectangles."""
+    width = min(rect.x + rect.width, other.x + other.width) - max(rect.x, other.x)
+    height = min(rect.y + rect.height, other.y + other.height) - max(rect.y, other.y)
+    return width * height
+
+
+class SpatialIndex:
+    """
+    Rectangles keyed by window XID, bucketed in a uniform grid.
+
+    Overlap queries only look at rectangles sharing a bucket, so they stay
+    cheap with hundreds of windows on a workspace.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self._cell_size = cell_size
+        self._rects = {}
+        self._buckets = defaultdict(set)
+
+    def _cells(self, rect):
+        size = self._cell_size
+        for col in range(
+            rect.x // size, (rect.x + max(rect.width, 1) - 1) // size + 1
+        ):
+            for row in range(
+                rect.y // size, (rect.y + max(rect.height, 1) - 1) // size + 1
+            ):
+                yield col, row
+
+    def insert(self, key, rect):
+        """Add or move rectangle."""
+        self.remove(key)
+        self._rects[key] = rect
+        for cell in self._cells(rect):
+            self._buckets[cell].add(key)
+
+    def remove(self, key):
+        """Remove rectangle if present."""
+        rect = self._rects.pop(key, None)
+        if rect is None:
+            return
+        for cell in self._cells(rect):
+            bucket = self._buckets[cell]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[cell]
+
+    def query(self, rect):
+        """Get rectangles overlapping rect."""
+        keys = set()
+        for cell in self._cells(rect):
+            keys.update(self._buckets.get(cell, ()))
+        return [
+            self._rects[key] for key in keys if intersects(rect, self._rects[key])
+        ]
+
+    def __len__(self):
+        return len(self._rects)
+
+
+class Placement:
+    """
+    Occupied space per workspace while placing one batch of windows.
+
+    Indexes are built on first use from the windows already on a workspace.
+    New windows of the batch only take up space once placed, so windows
+    arriving in the same burst are spread out instead of stacked.
+    """
+
+    def __init__(self, screen, windows, geometry):
+        self._screen = screen
+        self._geometry = geometry
+        self._batch_xids = {window.get_xid() for window in windows}
+        self._indexes = {}
+        self._targets = {}
+        self._no_fit = {}
+        self._cursors = {}
+
+    def set_workspace(self, window, space):
+        """Remember workspace a window is being moved to."""
+        self._targets[window.get_xid()] = space
+
+    def get_workspace(self, window):
+        """Get workspace window is on or being moved to."""
+        space = self._targets.get(window.get_xid()) or window.get_workspace()
+        if not space:
+            space = self._screen.get_active_workspace()
+        return space or self._screen.get_workspace(0)
+
+    def get_area(self, window):
+        """Get work area of the monitor window is on."""
+        return self._geometry.get_window_monitor(window).workarea
+
+    def get_index(self, space):
+        """Get spatial index of windows on workspace."""
+        number = space.get_number()
+        if number not in self._indexes:
+            index = SpatialIndex()
+            for window in self._screen.get_windows():
+                if (
+                    window.get_xid() in self._batch_xids
+                    or window.is_minimized()
+                    or window.get_window_type() in IGNORED_WINDOW_TYPES
+                    or not (window.is_pinned() or window.get_workspace() == space)
+                ):
+                    continue
+                index.insert(window.get_xid(), Rect(*window.get_geometry()))
+            self._indexes[number] = index
+        return self._indexes[number]
+
+    def grid(self, window, cols, rows):
+        """Resize window to the least covered cell of a cols x rows grid."""
+        space = self.get_workspace(window)
+        area = self.get_area(window)
+        index = self.get_index(space)
+        cells = [
+            Rect(
+                area.x + area.width * col // cols,
+                area.y + area.height * row // rows,
+                area.width * (col + 1) // cols - area.width * col // cols,
+                area.height * (row + 1) // rows - area.height * row // rows,
+            )
+            for row in range(rows)
+            for col in range(cols)
+        ]
+        cell = min(
+            cells,
+            key=lambda cell: sum(
+                overlap_area(cell, rect) for rect in index.query(cell)
+            ),
+        )
+        self.place(window, index, cell)
+
+    def tile(self, window):
+        """Move window to the top-most, left-most free spot it fits in."""
+        space = self.get_workspace(window)
+        area = self.get_area(window)
+        index = self.get_index(space)
+        _, _, width, height = window.get_geometry()
+        # Space only fills up during a batch: what did not fit never will, and
+        # the next free spot for a size is never before the previous one
+        no_fit = self._no_fit.setdefault((space.get_number(), area), [])
+        if any(width >= size[0] and height >= size[1] for size in no_fit):
+            return False
+        cursor_key = (space.get_number(), area, width, height)
+        start_y, start_x = self._cursors.get(cursor_key, (area.y, area.x))
+
+        # A free spot, if any, starts at an edge of the area or of a window
+        rects = index.query(area)
+        for ypos in sorted({area.y} | {rect.y + rect.height for rect in rects}):
+            if ypos < start_y:
+                continue
+            if ypos + height > area.y + area.height:
+                break
+            xpos = start_x if ypos == start_y else area.x
+            while xpos + width <= area.x + area.width:
+                rect = Rect(xpos, ypos, width, height)
+                hits = index.query(rect)
+                if not hits:
+                    self.place(window, index, rect)
+                    self._cursors[cursor_key] = (ypos, xpos)
+                    return True
+                xpos = max(hit.x + hit.width for hit in hits)
+        no_fit.append((width, height))
+        return False
+
+    def cascade(self, window, step_x, step_y):
+        """Move window to the first free step of a diagonal cascade."""
+        space = self.get_workspace(window)
+        area = self.get_area(window)
+        index = self.get_index(space)
+        _, _, width, height = window.get_geometry()
+
+        limits = [
+            (area_size - size) // step
+            for step, area_size, size in (
+                (step_x, area.width, width),
+                (step_y, area.height, height),
+            )
+            if step > 0
+        ]
+        steps = max(0, min(limits, default=0)) + 1
+        for step in range(steps):
+            xpos = area.x + step * step_x
+            ypos = area.y + step * step_y
+            taken = any(
+                (rect.x, rect.y) == (xpos, ypos)
+                for rect in index.query(Rect(xpos, ypos, 1, 1))
+            )
+            if not taken:
+                break
+        else:
+            step = len(index) % steps
+            xpos = area.x + step * step_x
+            ypos = area.y + step * step_y
+        self.place(window, index, Rect(xpos, ypos, width, height))
+
+    @staticmethod
+    def place(window, index, rect):
+        """Move and resize window frame to rect, mark its space taken."""
+        _, _, frame_w, frame_h = window.get_geometry()
+        _, _, client_w, client_h = window.get_client_window_geometry()
+        # Position refers to the frame, size to the client window
+        window.set_geometry(
+            Wnck.WindowGravity.NORTHWEST,
+            Wnck.WindowMoveResizeMask.X
+            | Wnck.WindowMoveResizeMask.Y
+            | Wnck.WindowMoveResizeMask.WIDTH
+            | Wnck.WindowMoveResizeMask.HEIGHT,
+            rect.x,
+            rect.y,
+            rect.width - (frame_w - client_w),
+            rect.height - (frame_h - client_h),
+        )
+        index.insert(window.get_xid(), rect)
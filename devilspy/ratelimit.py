@@ -0,0 +1,37 @@
+"""Token bucket used to rate limit window actions."""
+
+from collections import deque
+import time
+
+
+class TokenBucket:
+    """Token bucket refilled at rate tokens per second, holding up to burst tokens."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "queue", "source")
+
+    def __init__(self, rate, burst, now=None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic() if now is None else now
+        self.queue = deque()  # Windows waiting for a token
+        self.source = None  # GLib source draining the queue
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def consume(self, now=None):
+        """Take one token if available."""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def delay(self, now=None):
+        """Seconds until the next token is available."""
+        self._refill(time.monotonic() if now is None else now)
+        return max(0.0, (1 - self.tokens) / self.rate)
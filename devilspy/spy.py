@@ -1,38 +1,186 @@
 """Main devilspy manager object lives here."""
 
-from gi.repository import Wnck
+import signal
+import time
 
+from gi.repository import GLib, Wnck
+
+from devilspy.batch import EventBatch
+from devilspy.eventlog import FLUSH_INTERVAL, EventLog, format_record
+from devilspy.geometry import GeometryCache, WorkareaWatcher
 from devilspy.logger import main_logger
+from devilspy.stats import Stats
+from devilspy.windowinfo import FIELD_NAMES, WindowInfo
+from devilspy.windowtable import WindowTable
+from devilspy.worker import X11Worker
 
 window_logger = main_logger.getChild("window")
 
+# Warn if windows wait longer than this before being matched
+QUEUE_DELAY_WARNING = 0.25
+
 
 class WindowSpy:
     """Hook into new events, match windows and carry out custom actions."""
 
-    def __init__(self, config, print_window_info, no_actions):
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self, config, print_window_info, no_actions, screen_numbers=None, event_log=None
+    ):
         self._config = config
         self._print_window_info = print_window_info
         self._no_actions = no_actions
+        self.screen_spies = []
+        self.window_table = WindowTable(on_discard=WindowSpy._discard_window_record)
+        self.worker = X11Worker()
+        self.worker.start()
+        self.event_log = EventLog() if event_log is None else event_log
 
-        self._screen = Wnck.Screen.get_default()
-        self._screen.connect("window-opened", self.on_window_opened)
+        GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGUSR1, self.on_sigusr1)
+        GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGUSR2, self.on_sigusr2)
+        GLib.timeout_add_seconds(FLUSH_INTERVAL, self.on_flush_timeout)
 
-    def on_window_opened(self, screen, window):
-        """Callback for new windows."""
-        if self._print_window_info:
-            WindowSpy._print_info(window)
-        self.match_window(window, screen)
+        if not screen_numbers:
+            screens = [Wnck.Screen.get_default()]
+        else:
+            screens = []
+            for number in screen_numbers:
+                screen = Wnck.Screen.get(number)
+                if screen:
+                    screens.append(screen)
+                else:
+                    window_logger.warning("Screen %d does not exist.", number)
+
+        self.geometry = {}
+        for screen in screens:
+            self.geometry[screen.get_number()] = GeometryCache(screen)
+            self.screen_spies.append(ScreenSpy(self, screen))
+        self.workarea_watcher = WorkareaWatcher(
+            list(self.geometry), self.on_workarea_changed
+        )
+        self.workarea_watcher.start()
 
-    def match_window(self, window, screen):
+    def stop(self):
+        """Finish pending X11 requests, stop watchers and flush event log."""
+        self.worker.stop()
+        self.workarea_watcher.stop()
+        self.worker.join(timeout=1)
+        self.event_log.flush()
+
+    def on_workarea_changed(self, screen_number):
+        """Drop cached geometry of a screen whose work area changed."""
+        self.geometry[screen_number].invalidate()
+
+    def on_flush_timeout(self):
+        """Periodically flush event log stream."""
+        self.event_log.flush()
+        return True  # Keep timeout installed
+
+    def on_sigusr1(self):
+        """Log runtime statistics on SIGUSR1."""
+        for screen_spy in self.screen_spies:
+            screen_spy.stats.log()
+        window_logger.info(
+            "Tracked windows: %d (%d evicted)",
+            len(self.window_table),
+            self.window_table.evicted,
+        )
+        return True  # Keep signal handler installed
+
+    def on_sigusr2(self):
+        """Dump event log on SIGUSR2."""
+        window_logger.info(
+            "Event log:\n%s", "\n".join(format_record(record) for record in self.event_log)
+        )
+        self.event_log.flush()
+        return True  # Keep signal handler installed
+
+    @staticmethod
+    def _discard_window_record(record):
+        """Cancel pending timeouts of a window that is no longer tracked."""
+        for source in record.sources.values():
+            GLib.source_remove(source)
+        record.sources.clear()
+
+    def match_window(self, window, batch):
         """Match window agains all entries in configuration."""
-        for entry in self._config.entries:
-            if entry.match(window):
-                entry.run_actions(window, screen, dry_run=self._no_actions)
+        info = WindowInfo(window)
+        if not self._config.engine.prefilter(info):
+            batch.stats.incr("prefilter_rejected")
+            return
+        for entry in self._config.engine.match(info):
+            entry.handle(window, batch, dry_run=self._no_actions)
+
+    def print_info(self, window):
+        """Print window information if enabled."""
+        if self._print_window_info:
+            WindowSpy._print_info(window)
 
     @staticmethod
     def _print_info(window):
-        window_logger.info("  name:        '%s'", window.get_name())
-        window_logger.info("  class_group: '%s'", window.get_class_group_name())
-        window_logger.info("  role:        '%s'", window.get_role())
-        window_logger.info("  app_name:    '%s'", window.get_application().get_name())
+        info = WindowInfo(window)
+        window_logger.info(
+            "New window:\n%s",
+            "\n".join(
+                "  {:<15} '{}'".format(field + ":", info[field]) for field in FIELD_NAMES
+            ),
+        )
+
+
+class ScreenSpy:
+    """
+    Per-screen event handling.
+
+    All screens share the configuration and matching of their WindowSpy, but
+    queue and batch new windows on their own.
+    """
+
+    def __init__(self, spy, screen):
+        self._spy = spy
+        self._screen = screen
+        self._pending_windows = []
+        self._pending_source = None
+        self._pending_since = None
+        self.stats = Stats("Screen {}".format(screen.get_number()))
+
+        self._screen.connect("window-opened", self.on_window_opened)
+        self._screen.connect("window-closed", self.on_window_closed)
+
+    def on_window_opened(self, screen, window):
+        """Callback for new windows."""
+        self._spy.print_info(window)
+        # Windows opened in a burst are handled together once the main loop is idle
+        self._pending_windows.append(window)
+        if self._pending_source is None:
+            self._pending_since = time.monotonic()
+            self._pending_source = GLib.idle_add(self._process_pending_windows)
+
+    def on_window_closed(self, screen, window):
+        """Callback for closed windows."""
+        if window in self._pending_windows:
+            self._pending_windows.remove(window)
+        self._spy.window_table.discard(window.get_xid())
+
+    def _process_pending_windows(self):
+        """Match all pending windows as one batch."""
+        start = time.monotonic()
+        queue_delay = start - self._pending_since
+        windows = self._pending_windows
+        self._pending_windows = []
+        self._pending_source = None
+
+        batch = EventBatch(self._spy, self._screen, windows, self.stats)
+        for window in windows:
+            self._spy.match_window(window, batch)
+
+        self.stats.incr("batches")
+        self.stats.incr("windows", len(windows))
+        self.stats.observe("queue_delay", queue_delay)
+        self.stats.observe("batch_duration", time.monotonic() - start)
+        if queue_delay > QUEUE_DELAY_WARNING:
+            window_logger.warning(
+                "Screen %d is falling behind: windows waited %.0f ms.",
+                self._screen.get_number(),
+                queue_delay * 1000,
+            )
+        return False  # Notify GLib to remove this idle source
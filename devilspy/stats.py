@@ -0,0 +1,39 @@
+"""Runtime counters."""
+
+from collections import Counter
+
+from devilspy.logger import main_logger
+
+logger = main_logger.getChild("stats")
+
+
+class Stats:
+    """Counters and timings collected while devilspy is running."""
+
+    def __init__(self, title="Statistics"):
+        self.title = title
+        self.counters = Counter()
+        self.timings = {}
+
+    def incr(self, name, value=1):
+        """Increase counter by value."""
+        self.counters[name] += value
+
+    def observe(self, name, seconds):
+        """Record a duration, keeping count, total and maximum."""
+        count, total, maximum = self.timings.get(name, (0, 0.0, 0.0))
+        self.timings[name] = (count + 1, total + seconds, max(maximum, seconds))
+
+    def log(self):
+        """Log all counters and timings."""
+        logger.info("%s:", self.title)
+        for name, value in sorted(self.counters.items()):
+            logger.info("  %-28s %d", name, value)
+        for name, (count, total, maximum) in sorted(self.timings.items()):
+            logger.info(
+                "  %-28s avg %.1f ms, max %.1f ms (%d)",
+                name,
+                total / count * 1000,
+                maximum * 1000,
+                count,
+            )
@@ -0,0 +1,79 @@
+"""Window fields that rules can match, fetched lazily."""
+
+
+def _get_transient_for(window):
+    parent = window.get_transient()
+    return parent.get_class_group_name() if parent else ""
+
+
+def _get_geometry(window):
+    xpos, ypos, width, height = window.get_client_window_geometry()
+    return "{}x{}+{}+{}".format(width, height, xpos, ypos)
+
+
+def _get_workspace(window):
+    space = window.get_workspace()
+    return str(space.get_number()) if space else ""
+
+
+FIELD_GETTERS = {
+    "class_group": lambda window: window.get_class_group_name(),
+    "name": lambda window: window.get_name(),
+    "role": lambda window: window.get_role(),
+    "app_name": lambda window: window.get_application().get_name(),
+    "class_instance": lambda window: window.get_class_instance_name(),
+    "pid": lambda window: str(window.get_pid() or ""),
+    "window_type": lambda window: window.get_window_type().value_nick,
+    "transient_for": _get_transient_for,
+    "geometry": _get_geometry,
+    "workspace": _get_workspace,
+}
+FIELD_NAMES = tuple(FIELD_GETTERS)
+
+WINDOW_TYPES = (
+    "normal",
+    "desktop",
+    "dock",
+    "dialog",
+    "toolbar",
+    "menu",
+    "utility",
+    "splashscreen",
+)
+
+
+class WindowInfo:
+    """
+    Window fields, each fetched at most once and only when a rule asks for it.
+
+    Users not referencing expensive fields never pay for fetching them.
+    """
+
+    __slots__ = ("window", "_values")
+
+    def __init__(self, window, values=None):
+        self.window = window
+        self._values = {} if values is None else values
+
+    @classmethod
+    def from_values(cls, values):
+        """Create window info from known field values, without a window."""
+        values = dict(values)
+        values.setdefault("window_type", "normal")
+        return cls(None, values)
+
+    def is_transient(self):
+        """Check if window is transient for another window."""
+        if self.window is None:
+            return bool(self["transient_for"])
+        return self.window.get_transient() is not None
+
+    def __getitem__(self, field):
+        try:
+            return self._values[field]
+        except KeyError:
+            value = ""
+            if self.window is not None:
+                value = FIELD_GETTERS[field](self.window) or ""
+            self._values[field] = value
+            return value
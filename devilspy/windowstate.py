@@ -0,0 +1,97 @@
+"""Window state snapshots and minimal EWMH state changes."""
+
+from gi.repository import Wnck
+
+STATE_FLAGS = {
+    "fullscreen": Wnck.WindowState.FULLSCREEN,
+    "maximized_h": Wnck.WindowState.MAXIMIZED_HORIZONTALLY,
+    "maximized_v": Wnck.WindowState.MAXIMIZED_VERTICALLY,
+    "minimized": Wnck.WindowState.MINIMIZED,
+    "shaded": Wnck.WindowState.SHADED,
+    "skip_pager": Wnck.WindowState.SKIP_PAGER,
+    "skip_tasklist": Wnck.WindowState.SKIP_TASKLIST,
+    "sticky": Wnck.WindowState.STICKY,
+}
+
+# state name -> (set function, unset function)
+STATE_SETTERS = {
+    "fullscreen": (
+        lambda window, batch: window.set_fullscreen(True),
+        lambda window, batch: window.set_fullscreen(False),
+    ),
+    "maximized_h": (
+        lambda window, batch: window.maximize_horizontally(),
+        lambda window, batch: window.unmaximize_horizontally(),
+    ),
+    "maximized_v": (
+        lambda window, batch: window.maximize_vertically(),
+        lambda window, batch: window.unmaximize_vertically(),
+    ),
+    "minimized": (
+        lambda window, batch: window.minimize(),
+        lambda window, batch: window.unminimize(batch.timestamp),
+    ),
+    "pinned": (
+        lambda window, batch: window.pin(),
+        lambda window, batch: window.unpin(),
+    ),
+    "shaded": (
+        lambda window, batch: window.shade(),
+        lambda window, batch: window.unshade(),
+    ),
+    "skip_pager": (
+        lambda window, batch: window.set_skip_pager(True),
+        lambda window, batch: window.set_skip_pager(False),
+    ),
+    "skip_tasklist": (
+        lambda window, batch: window.set_skip_tasklist(True),
+        lambda window, batch: window.set_skip_tasklist(False),
+    ),
+    "sticky": (
+        lambda window, batch: window.stick(),
+        lambda window, batch: window.unstick(),
+    ),
+}
+
+
+def get_snapshot(window):
+    """Read window state once."""
+    state = window.get_state()
+    snapshot = {name: bool(state & flag) for name, flag in STATE_FLAGS.items()}
+    snapshot["pinned"] = window.is_pinned()
+    return snapshot
+
+
+def get_changes(snapshot, desired):
+    """Get state changes needed to get from snapshot to desired state."""
+    return {name: value for name, value in desired.items() if snapshot[name] != value}
+
+
+def apply_state(window, batch, desired):
+    """Send minimal requests to bring window into desired state.
+
+    Returns the number of requests sent.
+    """
+    changes = get_changes(get_snapshot(window), desired)
+    sent = 0
+
+    # Horizontal and vertical maximization fit into one _NET_WM_STATE message
+    if "maximized_h" in changes and changes["maximized_h"] == changes.get(
+        "maximized_v"
+    ):
+        if changes.pop("maximized_h"):
+            window.maximize()
+        else:
+            window.unmaximize()
+        del changes["maximized_v"]
+        sent += 1
+
+    for name, value in changes.items():
+        set_state, unset_state = STATE_SETTERS[name]
+        if value:
+            set_state(window, batch)
+        else:
+            unset_state(window, batch)
+        sent += 1
+
+    return sent
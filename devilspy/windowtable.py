@@ -0,0 +1,65 @@
+"""Bounded per-window state keyed by XID."""
+
+from collections import OrderedDict
+
+# Hard cap on tracked windows, least recently used records are evicted first
+MAX_WINDOWS = 4096
+
+
+class WindowRecord:
+    """State kept for a single window."""
+
+    __slots__ = ("xid", "data", "sources")
+
+    def __init__(self, xid):
+        self.xid = xid
+        self.data = {}
+        self.sources = {}  # Pending GLib source IDs belonging to this window
+
+
+class WindowTable:
+    """
+    Per-window state table.
+
+    Records are dropped when their window is closed. The table never grows
+    beyond max_size records, so missed close events cannot leak memory.
+    """
+
+    def __init__(self, max_size=MAX_WINDOWS, on_discard=None):
+        self.max_size = max_size
+        self.evicted = 0
+        self._on_discard = on_discard
+        self._records = OrderedDict()
+
+    def get(self, xid):
+        """Get record for window, creating it if needed."""
+        try:
+            record = self._records[xid]
+            self._records.move_to_end(xid)
+        except KeyError:
+            record = self._records[xid] = WindowRecord(xid)
+            if len(self._records) > self.max_size:
+                _, oldest = self._records.popitem(last=False)
+                self.evicted += 1
+                self._discard_record(oldest)
+        return record
+
+    def peek(self, xid):
+        """Get record for window without creating it (None if not tracked)."""
+        return self._records.get(xid)
+
+    def discard(self, xid):
+        """Drop record of a closed window."""
+        record = self._records.pop(xid, None)
+        if record is not None:
+            self._discard_record(record)
+
+    def _discard_record(self, record):
+        if self._on_discard is not None:
+            self._on_discard(record)
+
+    def __contains__(self, xid):
+        return xid in self._records
+
+    def __len__(self):
+        return len(self._records)
@@ -0,0 +1,104 @@
+"""Worker thread carrying out blocking Xlib requests off the main loop."""
+
+import queue
+import threading
+
+from gi.repository import GLib
+from Xlib.display import Display as XDisplay
+from Xlib.error import DisplayError
+
+from devilspy.logger import main_logger
+
+logger = main_logger.getChild("worker")
+
+
+class X11Worker(threading.Thread):
+    """
+    Run Xlib jobs on a dedicated thread with its own X connection.
+
+    Jobs are fed from the main loop and run strictly in submission order, so
+    jobs for the same window never overtake each other. Completion callbacks
+    and errors are passed back to the main loop. If the worker cannot connect
+    to the X server, all jobs fail instead of piling up.
+    """
+
+    def __init__(self):
+        super().__init__(name="devilspy-x11", daemon=True)
+        self._jobs = queue.Queue()
+        self._errors = []
+        self._lock = threading.Lock()
+        self._dead_error = None
+
+    def submit(self, xid, func, callback=None, errback=None):
+        """
+        Queue func(xdisplay, xid) to run on the worker thread.
+
+        On the main loop, callback(result) is called on success and
+        errback(error) on failure (errors are logged if no errback is given).
+        """
+        with self._lock:
+            if self._dead_error is None:
+                self._jobs.put((xid, func, callback, errback))
+                return
+        GLib.idle_add(self._report_error, xid, func, self._dead_error, errback)
+
+    def stop(self):
+        """Stop worker after all queued jobs are done."""
+        self._jobs.put(None)
+
+    def run(self):
+        try:
+            xdisplay = XDisplay()
+        except DisplayError as error:
+            logger.error("Worker could not connect to X server: %s", error)
+            self._fail_jobs(error)
+            return
+        xdisplay.set_error_handler(self._on_x_error)
+
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            xid, func, callback, errback = job
+            try:
+                result = func(xdisplay, xid)
+                xdisplay.sync()  # Flush and collect errors of this job
+            except Exception as error:  # pylint: disable=broad-except
+                self._errors.append(error)
+            if self._errors:
+                error, self._errors = self._errors[0], []
+                GLib.idle_add(self._report_error, xid, func, error, errback)
+            elif callback is not None:
+                GLib.idle_add(self._report_result, callback, result)
+
+        xdisplay.close()
+
+    def _fail_jobs(self, error):
+        """Fail queued and future jobs."""
+        with self._lock:
+            self._dead_error = error
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            if job is not None:
+                xid, func, _, errback = job
+                GLib.idle_add(self._report_error, xid, func, error, errback)
+
+    def _on_x_error(self, error, *_):
+        self._errors.append(error)
+
+    @staticmethod
+    def _report_result(callback, result):
+        callback(result)
+        return False  # Notify GLib to remove this idle source
+
+    @staticmethod
+    def _report_error(xid, func, error, errback):
+        if errback is None:
+            name = getattr(func, "__qualname__", func)
+            logger.warning("X11 job %s for window 0x%x failed: %s", name, xid, error)
+        else:
+            errback(error)
+        return False  # Notify GLib to remove this idle source
@@ -42,6 +42,7 @@ setup(
     url="https://github.com/buzz/devilspy",
     packages=find_packages(),
     install_requires=["click", "PyGObject", "PyYAML", "python-xlib"],
+    extras_require={"re2": ["google-re2"]},
     include_package_data=True,
     entry_points={"console_scripts": ["devilspy = devilspy.__main__:main"]},
 )
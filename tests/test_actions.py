@@ -0,0 +1,43 @@
+"""Tests for action validation."""
+
+import pytest
+
+from devilspy.config.actions import MONITOR_CURRENT, AbstractBaseAction
+from devilspy.config.errors import InvalidActionError
+
+
+@pytest.mark.parametrize(
+    "name, arg, monitor, expected",
+    [
+        ("center", True, 1, 1),
+        ("center", True, MONITOR_CURRENT, MONITOR_CURRENT),
+        ("position_wm", [0, 0], None, None),
+        ("position_wm", [0, 0], MONITOR_CURRENT, MONITOR_CURRENT),
+    ],
+)
+def test_monitor(name, arg, monitor, expected):
+    action = AbstractBaseAction.create(
+        {"name": name, "arg": arg, "monitor": monitor}, 0
+    )
+    assert action.monitor == expected
+
+
+@pytest.mark.parametrize(
+    "name, arg, monitor",
+    [
+        ("center", True, None),  # Centering needs a monitor
+        ("center", True, -1),
+        ("position_wm", [0, 0], "primary"),
+        ("position_wm", [0, 0], True),
+    ],
+)
+def test_invalid_monitor(name, arg, monitor):
+    with pytest.raises(InvalidActionError):
+        AbstractBaseAction.create({"name": name, "arg": arg, "monitor": monitor}, 0)
+
+
+def test_default_monitor():
+    center = AbstractBaseAction.create({"center": True}, 0)
+    position = AbstractBaseAction.create({"position_wm": [0, 0]}, 0)
+    assert center.monitor == MONITOR_CURRENT
+    assert position.monitor is None
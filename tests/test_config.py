@@ -0,0 +1,109 @@
+"""Tests for changing entries of a loaded config."""
+
+import pytest
+
+from devilspy.config import Config
+from devilspy.config.entry import Entry
+from devilspy.config.errors import ConfigValidationError, InvalidEntryError
+from devilspy.matcher import FieldIndex
+from devilspy.windowinfo import WINDOW_TYPES, WindowInfo
+
+
+def make_entry(class_group):
+    return {
+        "rules": [
+            {"match": "exact", "field": "class_group", "val": class_group},
+            {"match": "prefix", "field": "name", "val": class_group + " - "},
+        ],
+        "actions": [{"maximize": True}],
+    }
+
+
+def matching(config, class_group, name=""):
+    info = WindowInfo.from_values({"class_group": class_group, "name": name})
+    return [entry.name for entry in config.engine.match(info)]
+
+
+@pytest.fixture(name="config")
+def fixture_config():
+    return Config.create({"a": make_entry("A"), "b": make_entry("B")}, "test")
+
+
+def test_add_replace_remove(config):
+    config.add_entry("c", make_entry("C"))
+    assert matching(config, "C") == ["c"]
+    config.replace_entry("a", make_entry("C"))
+    assert matching(config, "C") == ["a", "c"]  # Keeps position of 'a'
+    assert not matching(config, "A")
+    config.remove_entry("c")
+    assert matching(config, "C") == ["a"]
+    with pytest.raises(InvalidEntryError):
+        config.remove_entry("c")
+    with pytest.raises(InvalidEntryError):
+        config.add_entry("a", make_entry("A"))
+
+
+def test_failed_update_leaves_config_unchanged(config, monkeypatch):
+    add = FieldIndex.add
+
+    def failing_add(self, rule, entry_id):
+        if rule.val == ["C - "]:
+            raise ValueError("boom")
+        add(self, rule, entry_id)
+
+    monkeypatch.setattr(FieldIndex, "add", failing_add)
+    with pytest.raises(ValueError):
+        config.add_entry("c", make_entry("C"))
+    with pytest.raises(ValueError):
+        config.replace_entry("a", make_entry("C"))
+    monkeypatch.undo()
+
+    assert [entry.name for entry in config.entries] == ["a", "b"]
+    assert not matching(config, "C")
+    assert matching(config, "A") == ["a"]
+    assert matching(config, "", "B - title") == ["b"]
+    assert config.engine.fields == {"class_group", "name"}
+
+
+def test_window_types_default():
+    entries = {"a": make_entry("A"), "b": dict(make_entry("B"), window_types="dock")}
+    config = Config.create(entries, "test")
+    assert config.entries[0].window_types == frozenset(WINDOW_TYPES)
+    assert config.entries[1].window_types == {"dock"}
+
+    config = Config.create(dict(entries, window_types=["normal", "dialog"]), "test")
+    assert [entry.name for entry in config.entries] == ["a", "b"]
+    assert config.entries[0].window_types == {"normal", "dialog"}
+    assert config.entries[1].window_types == {"dock"}
+    config.add_entry("c", make_entry("C"))
+    assert config.entries[2].window_types == {"normal", "dialog"}
+
+    with pytest.raises(InvalidEntryError):
+        Config.create(dict(entries, window_types=["window"]), "test")
+
+
+def test_entry_named_window_types():
+    config = Config.create({"window_types": make_entry("A")}, "test")
+    assert [entry.name for entry in config.entries] == ["window_types"]
+
+
+@pytest.mark.parametrize("transient", [None, True, False])
+def test_transient(transient):
+    config = Config.create({"a": dict(make_entry("A"), transient=transient)}, "test")
+    assert config.entries[0].transient is transient
+    with pytest.raises(InvalidEntryError):
+        Entry.create(dict(make_entry("A"), transient="yes"), "a")
+
+
+def test_screens():
+    assert Config.create({"a": make_entry("A")}, "test").screens == []
+    config = Config.create({"a": make_entry("A"), "screens": [0, 1]}, "test")
+    assert config.screens == [0, 1]
+    assert [entry.name for entry in config.entries] == ["a"]
+    assert Config.create({"a": make_entry("A"), "screens": 1}, "test").screens == [1]
+    config = Config.create({"screens": make_entry("A")}, "test")
+    assert [entry.name for entry in config.entries] == ["screens"]
+
+    for screens in ([], [-1], ["0"], [True]):
+        with pytest.raises(ConfigValidationError):
+            Config.create({"a": make_entry("A"), "screens": screens}, "test")
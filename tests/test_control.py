@@ -0,0 +1,45 @@
+"""Tests for handling control requests."""
+
+import json
+
+import pytest
+
+from devilspy.config import Config
+from devilspy.control import ControlServer
+
+
+@pytest.fixture(name="server")
+def fixture_server(tmp_path):
+    config = Config.create(
+        {"a": {"rules": [{"class_group": "A"}], "actions": [{"maximize": True}]}},
+        "test",
+    )
+    server = ControlServer(config, str(tmp_path / "control.sock"))
+    yield server
+    server.stop()
+
+
+def request(server, **kwargs):
+    return server.handle_request(json.dumps(kwargs))
+
+
+@pytest.mark.parametrize(
+    "entry",
+    [
+        {"rules": [{"match": ["x"], "field": "name", "val": "x"}], "actions": []},
+        {"rules": [{"class_group": "B"}], "actions": [{"name": ["maximize"]}]},
+        {"rules": "B", "actions": []},
+    ],
+)
+def test_invalid_entry_is_rejected(server, entry):
+    response = request(server, command="add", name="b", entry=entry)
+    assert response["ok"] is False
+    assert response["error"]
+    assert request(server, command="list") == {"entries": ["a"], "ok": True}
+
+
+def test_add_and_match(server):
+    entry = {"rules": [{"class_group": "B"}], "actions": [{"maximize": True}]}
+    assert request(server, command="add", name="b", entry=entry) == {"ok": True}
+    response = request(server, command="match", attributes={"class_group": "B"})
+    assert response["ok"] is True
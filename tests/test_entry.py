@@ -0,0 +1,84 @@
+"""Tests for carrying out entry actions."""
+
+from devilspy.config import entry as entry_module
+from devilspy.config.entry import Entry
+from devilspy.eventlog import EventLog
+from devilspy.stats import Stats
+
+
+class FakeBatch:
+    def __init__(self):
+        self.event_log = EventLog()
+        self.stats = Stats()
+
+
+class FakeWindow:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def get_xid(self):
+        return 1
+
+    def set_geometry(self, *args):
+        self.calls.append(("set_geometry", args[2:]))
+
+
+def test_state_actions_keep_configured_order(monkeypatch):
+    calls = []
+
+    def apply_state(window, batch, desired):
+        calls.append(("state", desired))
+        return len(desired)
+
+    monkeypatch.setattr(entry_module, "apply_state", apply_state)
+    entry = Entry.create(
+        {
+            "rules": [{"class_group": "X"}],
+            "actions": [
+                {"maximize": False},
+                {"minimize": False},
+                {"size": [640, 480]},
+                {"shade": True},
+            ],
+        },
+        "e",
+    )
+    batch = FakeBatch()
+    entry.run_actions(FakeWindow(calls), batch)
+
+    assert calls == [
+        ("state", {"maximized_h": False, "maximized_v": False, "minimized": False}),
+        ("set_geometry", (-1, -1, 640, 480)),
+        ("state", {"shaded": True}),
+    ]
+    assert [record.action for record in batch.event_log] == [
+        "maximize+minimize",
+        "size",
+        "shade",
+    ]
+
+
+def test_actions_wait_for_x11_requests(monkeypatch):
+    calls = []
+    jobs = []
+
+    class X11Batch(FakeBatch):
+        def submit_x11(self, window, func, on_done=None):
+            calls.append(("submit_x11", func.__self__.name))
+            jobs.append(on_done)
+
+    monkeypatch.setattr(entry_module, "apply_state", lambda *args: 0)
+    entry = Entry.create(
+        {
+            "rules": [{"class_group": "X"}],
+            "actions": [{"position_x11": [10, 20]}, {"size": [640, 480]}],
+        },
+        "e",
+    )
+    batch = X11Batch()
+    entry.run_actions(FakeWindow(calls), batch)
+    assert calls == [("submit_x11", "position_x11")]
+
+    jobs.pop()()  # Request done
+    assert calls[1:] == [("set_geometry", (-1, -1, 640, 480))]
+    assert [record.action for record in batch.event_log] == ["position_x11", "size"]
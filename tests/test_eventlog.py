@@ -0,0 +1,24 @@
+"""Tests for writing and reading the event log."""
+
+import io
+
+import pytest
+
+from devilspy.eventlog import WRITERS, EventLog, read_records
+
+
+@pytest.mark.parametrize("fmt", sorted(WRITERS))
+def test_round_trip(fmt):
+    stream = io.BytesIO()
+    event_log = EventLog(writer=WRITERS[fmt](stream))
+    event_log.record(0x1200003, "editor", "maximize", 0.25)
+    event_log.record(0x1200004, 123, "workspace+shade", 0.0)  # Numeric entry name
+    event_log.flush()
+
+    stream.seek(0)
+    records = list(read_records(stream))
+    assert records == list(event_log)
+    assert [(record.xid, record.entry, record.action) for record in records] == [
+        (0x1200003, "editor", "maximize"),
+        (0x1200004, "123", "workspace+shade"),
+    ]
@@ -0,0 +1,90 @@
+"""Tests for the config performance linter."""
+
+import pytest
+
+from devilspy.config import Config
+from devilspy.config.lint import analyze_regex, lint_config
+
+
+@pytest.mark.parametrize(
+    "pattern, literal, anchored_start, anchored_end",
+    [
+        ("Firefox", "Firefox", False, False),
+        ("^Firefox", "Firefox", True, False),
+        ("Firefox$", "Firefox", False, True),
+        ("^Firefox$", "Firefox", True, True),
+        (r"^Fire\.fox$", "Fire.fox", True, True),
+        ("^Fire.ox$", None, True, True),
+        ("(?i)firefox", None, False, False),
+    ],
+)
+def test_literal(pattern, literal, anchored_start, anchored_end):
+    info = analyze_regex(pattern)
+    assert info.error is None
+    assert info.literal == literal
+    assert info.anchored_start == anchored_start
+    assert info.anchored_end == anchored_end
+
+
+@pytest.mark.parametrize(
+    "pattern, backtracking",
+    [
+        ("^(a+)+$", True),
+        ("(a*)*b", True),
+        ("(.*a){20}", True),
+        ("(?:x|(a+))+", True),
+        ("^a+b+$", False),
+        ("(ab){3}", False),
+        ("^.* - Editor$", False),
+    ],
+)
+def test_backtracking(pattern, backtracking):
+    assert analyze_regex(pattern).backtracking == backtracking
+
+
+@pytest.mark.parametrize(
+    "pattern, satisfiable",
+    [
+        ("a$b", False),
+        ("a^b", False),
+        (r"a\Zb", False),
+        (r"a\Z\n", False),
+        ("a$\n\n", False),
+        ("a$\n", True),  # '$' matches before a trailing newline
+        ("a$\n$", True),
+        ("(?m)a$\nb", True),
+        ("^a$", True),
+    ],
+)
+def test_satisfiable(pattern, satisfiable):
+    assert analyze_regex(pattern).satisfiable == satisfiable
+
+
+def lint(entries):
+    config = Config.create(
+        {
+            name: {
+                "rules": [dict(rule, field="name") for rule in rules],
+                "actions": [{"maximize": True}],
+            }
+            for name, rules in entries.items()
+        },
+        "test",
+    )
+    findings, _ = lint_config(config)
+    return [(finding.entry, finding.message) for finding in findings]
+
+
+def test_lint_config():
+    findings = lint(
+        {
+            "literal": [{"match": "regex", "val": "^Editor$"}],
+            "never": [{"match": "regex", "val": "a$b"}],
+            "newline": [{"match": "regex", "val": "a$\n"}],
+        }
+    )
+    assert findings == [
+        ("literal", "Regex '^Editor$' is a literal."),
+        ("never", "Regex 'a$b' can never match."),
+        ("never", "Entry can never fire."),
+    ]
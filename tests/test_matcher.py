@@ -0,0 +1,88 @@
+"""Tests for glob splitting, tries and the match engine."""
+
+import pytest
+
+from devilspy.config import Config
+from devilspy.matcher import Trie, split_glob
+from devilspy.windowinfo import WindowInfo
+
+
+@pytest.mark.parametrize(
+    "glob, expected",
+    [
+        ("Firefox", ("Firefox", "Firefox")),
+        ("Fire*", ("Fire", "")),
+        ("*fox", ("", "fox")),
+        ("Fi*re?fox", ("Fi", "fox")),
+        ("Doc [0-9].txt", ("Doc ", ".txt")),
+        ("[!a]bc", ("", "bc")),
+        ("a[]]b", ("a", "b")),
+        ("a[!]]b", ("a", "b")),
+        # Unclosed brackets are literals
+        ("Foo [1", ("Foo [1", "Foo [1")),
+        ("Foo [1*", ("Foo [1", "")),
+        ("*Foo [1", ("", "Foo [1")),
+        ("a[*b", ("a[", "b")),
+        ("a]b*", ("a]b", "")),
+        ("", ("", "")),
+        ("*", ("", "")),
+        ("[", ("[", "[")),
+        ("[]", ("[]", "[]")),
+    ],
+)
+def test_split_glob(glob, expected):
+    assert split_glob(glob) == expected
+
+
+def test_trie_find_prefixes():
+    trie = Trie()
+    trie.insert("", 0)
+    trie.insert("Fire", 1)
+    trie.insert("Firefox", 2)
+    trie.insert("Fire", 3)
+    assert list(trie.find("Firefox Nightly")) == [0, 1, 3, 2]
+    assert list(trie.find("Fir")) == [0]
+    assert list(trie.find("")) == [0]
+
+
+def test_trie_remove_prunes_nodes():
+    trie = Trie()
+    trie.insert("ab", 1)
+    trie.insert("abc", 2)
+    trie.remove("abc", 2)
+    assert list(trie.find("abc")) == [1]
+    assert not trie._root.children["a"].children["b"].children
+    trie.remove("ab", 1)
+    assert not trie._root.children
+    trie.remove("missing", 1)  # Unknown keys are ignored
+    trie.remove("", 1)
+
+
+def make_config(globs):
+    return Config.create(
+        {
+            "e{}".format(i): {
+                "rules": [{"match": "glob", "field": "name", "val": glob}],
+                "actions": [{"maximize": True}],
+            }
+            for i, glob in enumerate(globs)
+        },
+        "test",
+    )
+
+
+@pytest.mark.parametrize(
+    "glob, name, matches",
+    [
+        ("Foo [1", "Foo [1", True),
+        ("Foo [1", "Foo 1", False),
+        ("Foo [1*", "Foo [12", True),
+        ("Doc [0-9].txt", "Doc 5.txt", True),
+        ("Doc [0-9].txt", "Doc x.txt", False),
+        ("*", "anything", True),
+    ],
+)
+def test_glob_entries(glob, name, matches):
+    config = make_config([glob])
+    info = WindowInfo.from_values({"name": name})
+    assert bool(config.engine.match(info)) == matches
@@ -0,0 +1,108 @@
+"""Tests for per-application rate limit buckets."""
+
+import pytest
+
+from devilspy.config import Config
+from devilspy.config import ratelimit as ratelimit_module
+from devilspy.config.ratelimit import RateLimit
+from devilspy.eventlog import EventLog
+from devilspy.stats import Stats
+from devilspy.windowtable import WindowTable
+
+
+class FakeGLib:
+    def __init__(self):
+        self.sources = {}
+
+    def timeout_add(self, delay, func, *args):
+        source = len(self.sources) + 1
+        self.sources[source] = (func, args)
+        return source
+
+    def source_remove(self, source):
+        del self.sources[source]
+
+
+class FakeBatch:
+    def __init__(self):
+        self.event_log = EventLog()
+        self.stats = Stats()
+        self.window_table = WindowTable()
+
+
+class FakeWindow:
+    def __init__(self, xid, app):
+        self.xid = xid
+        self.app = app
+
+    def get_xid(self):
+        return self.xid
+
+    def get_class_group_name(self):
+        return self.app
+
+    @staticmethod
+    def get_application():
+        return None
+
+
+@pytest.fixture(name="glib")
+def fixture_glib(monkeypatch):
+    glib = FakeGLib()
+    monkeypatch.setattr(ratelimit_module, "GLib", glib)
+    monkeypatch.setattr(ratelimit_module, "MAX_BUCKETS", 2)
+    return glib
+
+
+def test_least_recently_used_bucket_is_evicted(glib):
+    limit = RateLimit.create({"rate": 0.001, "burst": 1, "mode": "queue"})
+    batch = FakeBatch()
+    ran = []
+
+    def run(window, _):
+        ran.append(window.app)
+
+    for xid, app in enumerate(["a", "b", "b", "a", "c"]):
+        limit.admit(FakeWindow(xid, app), batch, run)
+
+    # 'b' was seen least recently, its queued window is dropped with it
+    assert ran == ["a", "b", "c"]
+    assert list(limit._buckets) == ["a", "c"]
+    assert len(glib.sources) == 1
+    assert batch.stats.counters["rate_limit_evicted"] == 1
+    assert batch.stats.counters["rate_limit_dropped"] == 1
+    assert batch.stats.counters["rate_limit_queued"] == 2
+
+
+def test_bucket_count_stays_bounded(glib):
+    limit = RateLimit.create({"rate": 0.001, "burst": 1, "mode": "skip"})
+    batch = FakeBatch()
+    for xid in range(100):
+        limit.admit(FakeWindow(xid, str(xid)), batch, lambda *args: None)
+    assert len(limit._buckets) == 2
+    assert batch.stats.counters["rate_limit_evicted"] == 98
+    assert not glib.sources
+
+
+@pytest.mark.parametrize("change", ["replace", "remove"])
+def test_removed_entry_drops_queued_windows(glib, change):
+    entry = {
+        "rules": [{"class_group": "a"}],
+        "actions": [{"maximize": True}],
+        "rate_limit": {"rate": 0.001, "burst": 1, "mode": "queue"},
+    }
+    config = Config.create({"e": entry}, "test")
+    limit = config.entries[0].rate_limit
+    batch = FakeBatch()
+    for xid in range(3):
+        config.entries[0].handle(FakeWindow(xid, "a"), batch, dry_run=True)
+    assert batch.stats.counters["rate_limit_queued"] == 2
+    assert len(glib.sources) == 1
+
+    if change == "replace":
+        config.replace_entry("e", entry)
+    else:
+        config.remove_entry("e")
+    assert not glib.sources
+    assert not limit._buckets
+    assert batch.stats.counters["rate_limit_dropped"] == 2
@@ -0,0 +1,30 @@
+"""Tests for window matcher rules."""
+
+import pytest
+
+from devilspy.config import rules as rules_module
+from devilspy.config.errors import InvalidRuleError
+from devilspy.config.rules import RegexRule
+from devilspy.windowinfo import WindowInfo
+
+
+def make_rule(val, **kwargs):
+    return RegexRule.create(dict(match="regex", field="name", val=val, **kwargs), 0)
+
+
+@pytest.fixture(name="no_re2")
+def fixture_no_re2(monkeypatch):
+    monkeypatch.setattr(rules_module, "re2", None)
+
+
+@pytest.mark.parametrize("engine", ["auto", "re", "re2"])
+def test_backtracking_regex_rejected_with_re(no_re2, engine):
+    with pytest.raises(InvalidRuleError) as error:
+        make_rule(["Editor", "^(a+)+$"], engine=engine)
+    assert "catastrophic backtracking" in error.value.message
+
+
+def test_regex_matches(no_re2):
+    rule = make_rule("^a+b$", max_length=4)
+    assert rule.match(WindowInfo.from_values({"name": "aab"}))
+    assert not rule.match(WindowInfo.from_values({"name": "aaaab"}))  # Cut to "aaaa"